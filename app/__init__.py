@@ -1,6 +1,9 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from config import Config
 from .main_routes import main_bp 
 
@@ -9,9 +12,31 @@ db = SQLAlchemy()
 login_manager = LoginManager()
 
 
-def create_app():
-    app = Flask(__name__)
+def _configure_sqlite(engine, pragmas):
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _engine_options(config):
+    options = dict(config["SQLALCHEMY_ENGINE_OPTIONS"])
+    if make_url(config["SQLALCHEMY_DATABASE_URI"]).get_backend_name() == "sqlite":
+        options["connect_args"] = {**config["SQLITE_CONNECT_ARGS"], **options.get("connect_args", {})}
+    return options
+
+
+def create_app(config=None, instance_path=None):
+    app = Flask(__name__, instance_path=instance_path)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = _engine_options(app.config)
 
     db.init_app(app)
     login_manager.init_app(app)
@@ -27,8 +52,38 @@ def create_app():
     app.register_blueprint(professor_bp)
     app.register_blueprint(student_bp)
     app.register_blueprint(main_bp)
-    # Create DB tables
+
+    from .metrics import init_app as init_metrics
+    init_metrics(app)
+
     with app.app_context():
-        db.create_all()
+        _configure_sqlite(db.engine, app.config["SQLITE_PRAGMAS"])
+
+    # Schema creation is an explicit step (flask --app run migrate), not part of every boot
+    @app.cli.command("migrate")
+    def migrate_command():
+        """Create any missing database tables."""
+        migrate()
+        print("Database tables are up to date.")
+
+    @app.cli.command("rebuild-stats")
+    @click.argument("assignment_ids", nargs=-1)
+    def rebuild_stats_command(assignment_ids):
+        """Recompute dashboard stats from the stored submissions (all assignments by default)."""
+        from .assignment_stats import rebuild
+        from .supabase_service import get_all_assignments
+
+        for assignment_id in assignment_ids or get_all_assignments():
+            stats = rebuild(assignment_id)
+            print(f"{assignment_id}: {stats['submissions']} submission(s)")
 
     return app
+
+
+def migrate():
+    """
+    Create any missing tables. Needs an app context.
+    """
+    from . import models  # noqa: F401  (registers the tables)
+
+    db.create_all()
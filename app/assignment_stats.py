@@ -0,0 +1,211 @@
+import json
+import math
+import os
+import sqlite3
+import time
+from flask import current_app
+
+# Per-assignment aggregates, updated as each submission is written so the
+# professor dashboard never scans submissions. Scores and plagiarism
+# percentages are both on a 0-100 scale, binned in tens.
+BINS = 10
+BIN_WIDTH = 100 / BINS
+
+
+def _stats_path():
+    path = current_app.config["ASSIGNMENT_STATS_PATH"]
+    if not os.path.isabs(path):
+        path = os.path.join(current_app.instance_path, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _connect():
+    conn = sqlite3.connect(_stats_path(), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS assignment_stats (
+            assignment_id TEXT PRIMARY KEY,
+            submissions INTEGER NOT NULL,
+            scored INTEGER NOT NULL,
+            score_mean REAL NOT NULL,
+            score_m2 REAL NOT NULL,
+            score_min REAL,
+            score_max REAL,
+            score_histogram TEXT NOT NULL,
+            plagiarism_count INTEGER NOT NULL,
+            plagiarism_mean REAL NOT NULL,
+            plagiarism_histogram TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """
+    )
+    # submissions already folded into their assignment's stats
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS counted_submissions (submission_id TEXT PRIMARY KEY, assignment_id TEXT NOT NULL)"
+    )
+    return conn
+
+
+def _bin(value):
+    return min(max(int(value // BIN_WIDTH), 0), BINS - 1)
+
+
+def _empty(assignment_id):
+    return {
+        "assignment_id": assignment_id,
+        "submissions": 0,
+        "scored": 0,
+        "score_mean": 0.0,
+        "score_m2": 0.0,
+        "score_min": None,
+        "score_max": None,
+        "score_histogram": [0] * BINS,
+        "plagiarism_count": 0,
+        "plagiarism_mean": 0.0,
+        "plagiarism_histogram": [0] * BINS,
+    }
+
+
+def _from_row(row):
+    stats = dict(row)
+    stats["score_histogram"] = json.loads(stats["score_histogram"])
+    stats["plagiarism_histogram"] = json.loads(stats["plagiarism_histogram"])
+    return stats
+
+
+def _add(stats, score, plagiarism):
+    stats["submissions"] += 1
+
+    if isinstance(score, (int, float)):
+        # Welford's update: mean and sum of squared deviations in one pass
+        stats["scored"] += 1
+        delta = score - stats["score_mean"]
+        stats["score_mean"] += delta / stats["scored"]
+        stats["score_m2"] += delta * (score - stats["score_mean"])
+        stats["score_min"] = score if stats["score_min"] is None else min(stats["score_min"], score)
+        stats["score_max"] = score if stats["score_max"] is None else max(stats["score_max"], score)
+        stats["score_histogram"][_bin(score)] += 1
+
+    if isinstance(plagiarism, (int, float)):
+        stats["plagiarism_count"] += 1
+        stats["plagiarism_mean"] += (plagiarism - stats["plagiarism_mean"]) / stats["plagiarism_count"]
+        stats["plagiarism_histogram"][_bin(plagiarism)] += 1
+
+
+def _save(conn, stats):
+    row = dict(
+        stats,
+        score_histogram=json.dumps(stats["score_histogram"]),
+        plagiarism_histogram=json.dumps(stats["plagiarism_histogram"]),
+        updated_at=time.time(),
+    )
+    columns = ", ".join(row)
+    conn.execute(
+        f"INSERT OR REPLACE INTO assignment_stats ({columns}) VALUES ({', '.join('?' * len(row))})",
+        list(row.values()),
+    )
+
+
+def record_submission(assignment_id, submission_id, score, plagiarism):
+    """
+    Fold one new submission into its assignment's stats, once.
+    """
+    assignment_id = str(assignment_id)
+    conn = _connect()
+    try:
+        # the write lock is taken before the read, so concurrent workers never lose an update
+        conn.execute("BEGIN IMMEDIATE")
+        counted = conn.execute(
+            "INSERT OR IGNORE INTO counted_submissions (submission_id, assignment_id) VALUES (?, ?)",
+            (str(submission_id), assignment_id),
+        )
+        if not counted.rowcount:
+            # a rebuild already read this row from Supabase
+            conn.execute("COMMIT")
+            return
+        row = conn.execute("SELECT * FROM assignment_stats WHERE assignment_id = ?", (assignment_id,)).fetchone()
+        stats = _from_row(row) if row else _empty(assignment_id)
+        _add(stats, score, plagiarism)
+        _save(conn, stats)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def rebuild(assignment_id):
+    """
+    Recompute an assignment's stats from its submissions, for backfills and
+    after a regrade has rewritten scores. This is the one path that scans.
+    """
+    from .supabase_service import iter_submissions_for_assignment
+
+    assignment_id = str(assignment_id)
+    stats = _empty(assignment_id)
+    conn = _connect()
+    try:
+        # held across the scan: a record_submission that lands meanwhile waits, then
+        # either finds its row already counted or adds a row the scan did not see
+        conn.execute("BEGIN IMMEDIATE")
+        ids = []
+        for row in iter_submissions_for_assignment(assignment_id, columns="id, score, plagiarism_percent, created_at"):
+            _add(stats, row.get("score"), row.get("plagiarism_percent"))
+            ids.append((str(row["id"]), assignment_id))
+        _save(conn, stats)
+        conn.execute("DELETE FROM counted_submissions WHERE assignment_id = ?", (assignment_id,))
+        conn.executemany("INSERT OR IGNORE INTO counted_submissions (submission_id, assignment_id) VALUES (?, ?)", ids)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return stats
+
+
+def _median(histogram, count, low, high):
+    """
+    Median estimated from the histogram, interpolated within its bin.
+    """
+    if not count:
+        return None
+    half, seen = count / 2, 0
+    for i, n in enumerate(histogram):
+        if n and seen + n >= half:
+            estimate = (i + (half - seen) / n) * BIN_WIDTH
+            return min(max(estimate, low), high)
+        seen += n
+    return high
+
+
+def get_stats(assignment_ids):
+    """
+    {assignment_id: stats} with count, mean, standard deviation, min / max,
+    estimated median and both histograms. Assignments without submissions map
+    to empty stats.
+    """
+    ids = [str(a) for a in assignment_ids]
+    if not ids:
+        return {}
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM assignment_stats WHERE assignment_id IN ({', '.join('?' * len(ids))})", ids
+        ).fetchall()
+    finally:
+        conn.close()
+
+    found = {row["assignment_id"]: _from_row(row) for row in rows}
+    result = {}
+    for assignment_id in ids:
+        stats = found.get(assignment_id) or _empty(assignment_id)
+        stats.pop("updated_at", None)
+        scored = stats["scored"]
+        stats["score_std"] = math.sqrt(stats["score_m2"] / scored) if scored else None
+        stats["score_median"] = _median(stats["score_histogram"], scored, stats["score_min"], stats["score_max"])
+        result[assignment_id] = stats
+    return result
@@ -1,15 +1,46 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import pickle
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required
+from sqlalchemy import event
+from .cache import cache_key, get_cache_backend, invalidate
 from .models import User
 from . import db, login_manager
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
 
+# ---------------- USER LOADER CACHE ---------------- #
+# Snapshots of user columns keyed by id, in the shared cache, so a change made in
+# one worker evicts the entry for every worker on the host. Cached users come
+# back as transient User objects, so no session state leaks between requests.
+
+_USER_COLUMNS = ("id", "full_name", "email", "password_hash", "role")
+
+
+def invalidate_user(user_id):
+    invalidate("user", user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    invalidate_user(target.id)
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    ttl = current_app.config["CACHE_TTLS"].get("user", 0)
+    key = cache_key("user", user_id)
+    blob = get_cache_backend().get(key) if ttl else None
+    if blob is not None:
+        return User(**pickle.loads(blob))
+
+    user = db.session.get(User, int(user_id))
+    if user is not None and ttl:
+        snapshot = {c: getattr(user, c) for c in _USER_COLUMNS}
+        get_cache_backend().set(key, pickle.dumps(snapshot), ttl)
+    return user
 
 
 @auth_bp.route("/register", methods=["GET", "POST"])
@@ -0,0 +1,164 @@
+import functools
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+
+# ---------------- BACKENDS ---------------- #
+# Values are stored pickled so callers can never mutate a cached object in place.
+
+class MemoryBackend:
+    """Per-process LRU with expiry."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at, blob)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, blob, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, blob)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteBackend:
+    """
+    Cache file shared by every worker process on the host. Reads never write:
+    expired rows and the oldest insertions beyond max_entries are trimmed on
+    roughly one write in TRIM_EVERY, so the bound is approximate.
+    """
+
+    TRIM_EVERY = 64
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def set(self, key, blob, ttl):
+        now = time.time()
+        with self._connect() as conn:
+            # REPLACE deletes and re-inserts, so rowid order is insertion order
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)", (key, now + ttl, blob)
+            )
+            if random.randrange(self.TRIM_EVERY) == 0:
+                self._trim(conn, now)
+
+    def _trim(self, conn, now):
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM cache WHERE rowid IN "
+            "(SELECT rowid FROM cache ORDER BY rowid LIMIT max((SELECT COUNT(*) FROM cache) - ?, 0))",
+            (self.max_entries,),
+        )
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_cache_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = current_app.config
+                if config["CACHE_BACKEND"] == "sqlite":
+                    path = config["CACHE_PATH"]
+                    if not os.path.isabs(path):
+                        path = os.path.join(current_app.instance_path, path)
+                    _backend = SQLiteBackend(path, config["CACHE_MAX_ENTRIES"])
+                else:
+                    _backend = MemoryBackend(config["CACHE_MAX_ENTRIES"])
+    return _backend
+
+
+# ---------------- READ-THROUGH API ---------------- #
+
+def cache_key(namespace, *args):
+    return ":".join([namespace, *(str(a) for a in args)])
+
+
+def cached(namespace):
+    """
+    Read-through cache for a data-access function. The TTL comes from
+    CACHE_TTLS[namespace]; a TTL of 0 disables caching for that entity.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            ttl = current_app.config["CACHE_TTLS"].get(namespace, 0)
+            if not ttl:
+                return func(*args)
+
+            backend = get_cache_backend()
+            key = cache_key(namespace, *args)
+            blob = backend.get(key)
+            if blob is not None:
+                return pickle.loads(blob)
+
+            value = func(*args)
+            backend.set(key, pickle.dumps(value), ttl)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(namespace, *args):
+    get_cache_backend().delete(cache_key(namespace, *args))
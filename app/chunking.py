@@ -0,0 +1,75 @@
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+_encodings = {}
+_WORD_RE = re.compile(r"\S+\s*")
+
+
+def count_tokens(text, model="gpt-4.1-mini"):
+    """
+    Token count with tiktoken when available, else ~4 characters per token.
+    """
+    if not text:
+        return 0
+    if tiktoken is None:
+        return (len(text) + 3) // 4
+
+    enc = _encodings.get(model)
+    if enc is None:
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            enc = tiktoken.get_encoding("o200k_base")
+        _encodings[model] = enc
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def split_oversized(paragraph, max_tokens, model="gpt-4.1-mini"):
+    """
+    Cut one paragraph into word-aligned pieces of at most `max_tokens` (a single
+    longer word becomes a piece of its own).
+    """
+    piece, piece_tokens = [], 0
+    for word in _WORD_RE.findall(paragraph):
+        word_tokens = count_tokens(word, model)
+        if piece and piece_tokens + word_tokens > max_tokens:
+            yield "".join(piece).strip()
+            piece, piece_tokens = [], 0
+        piece.append(word)
+        piece_tokens += word_tokens
+    if piece:
+        yield "".join(piece).strip()
+
+
+def chunk_text(text, max_tokens, model="gpt-4.1-mini"):
+    """
+    Greedily pack paragraphs into chunks of at most `max_tokens`. Paragraphs are
+    never split unless a single one is larger than the budget.
+    """
+    chunks, current, current_tokens = [], [], 0
+
+    for paragraph in (text or "").split("\n"):
+        if not paragraph.strip():
+            continue
+        tokens = count_tokens(paragraph, model)
+
+        if tokens > max_tokens:
+            if current:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(split_oversized(paragraph, max_tokens, model))
+            continue
+
+        if current and current_tokens + tokens + 1 > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += tokens + 1
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
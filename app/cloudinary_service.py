@@ -1,15 +1,47 @@
-import cloudinary
-import cloudinary.uploader
+import os
+import threading
 from flask import current_app
+from .metrics import timed
 
+_configured = False
+_config_lock = threading.Lock()
 
+
+def _configure():
+    # cloudinary.config is process-global; set it once per process
+    global _configured
+    import cloudinary
+
+    if not _configured:
+        with _config_lock:
+            if not _configured:
+                cloudinary.config(
+                    cloud_name=current_app.config["CLOUDINARY_CLOUD_NAME"],
+                    api_key=current_app.config["CLOUDINARY_API_KEY"],
+                    api_secret=current_app.config["CLOUDINARY_API_SECRET"],
+                    secure=True,
+                )
+                _configured = True
+
+
+def local_blob_dir():
+    # STORAGE_BACKEND = "local": relative paths live in the instance folder
+    directory = current_app.config["LOCAL_BLOB_DIR"]
+    if not os.path.isabs(directory):
+        directory = os.path.join(current_app.instance_path, directory)
+    return directory
+
+
+@timed("upload")
 def upload_docx_to_cloudinary(file):
-    cloudinary.config(
-        cloud_name=current_app.config["CLOUDINARY_CLOUD_NAME"],
-        api_key=current_app.config["CLOUDINARY_API_KEY"],
-        api_secret=current_app.config["CLOUDINARY_API_SECRET"],
-        secure=True,
-    )
+    if current_app.config["STORAGE_BACKEND"] == "local":
+        from .local_backends import save_local_blob
+
+        return save_local_blob(local_blob_dir(), file)
+
+    import cloudinary.uploader
+
+    _configure()
 
     upload = cloudinary.uploader.upload(
         file,
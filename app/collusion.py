@@ -0,0 +1,166 @@
+import pickle
+import re
+import time
+import numpy as np
+from flask import current_app
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from .cache import cache_key, get_cache_backend
+
+# Hashed word-shingle TF-IDF vectors; cosine similarity of every pair comes from
+# one sparse matrix product instead of N² SequenceMatcher calls.
+SHINGLE_SIZE = 3
+N_FEATURES = 1 << 20
+
+_WORD_RE = re.compile(r"\w+")
+_PRIME = np.int64(1_000_003)
+
+
+def _shingle_hashes(text, vocab):
+    ids = np.fromiter(
+        (vocab.setdefault(w, len(vocab) + 1) for w in _WORD_RE.findall((text or "").lower())),
+        dtype=np.int64,
+    )
+    if len(ids) < SHINGLE_SIZE:
+        return ids % N_FEATURES
+
+    # polynomial hash of each window of SHINGLE_SIZE word ids
+    h = np.zeros(len(ids) - SHINGLE_SIZE + 1, dtype=np.int64)
+    for k in range(SHINGLE_SIZE):
+        h = (h * _PRIME + ids[k:len(ids) - SHINGLE_SIZE + 1 + k]) % N_FEATURES
+    return h
+
+
+def tfidf_matrix(texts):
+    """
+    Rows are L2-normalized TF-IDF vectors over hashed shingles.
+    """
+    vocab = {}
+    rows, cols, data = [], [], []
+    for i, text in enumerate(texts):
+        features, counts = np.unique(_shingle_hashes(text, vocab), return_counts=True)
+        rows.append(np.full(len(features), i, dtype=np.int64))
+        cols.append(features)
+        data.append(counts.astype(np.float64))
+
+    n = len(texts)
+    if not n:
+        return sparse.csr_matrix((0, N_FEATURES))
+
+    tf = sparse.csr_matrix(
+        (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(n, N_FEATURES)
+    )
+    tf.data = 1 + np.log(tf.data)
+
+    df = np.bincount(tf.indices, minlength=N_FEATURES)
+    idf = np.log((1 + n) / (1 + df)) + 1
+    x = tf.multiply(idf).tocsr()
+
+    norms = np.sqrt(np.asarray(x.multiply(x).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ x
+
+
+def similar_pairs(x, threshold):
+    """
+    (i, j, similarity) for every pair i < j at or above `threshold`.
+    """
+    sims = sparse.triu(x @ x.T, k=1).tocoo()
+    keep = sims.data >= threshold
+    return list(zip(sims.row[keep].tolist(), sims.col[keep].tolist(), sims.data[keep].tolist()))
+
+
+def find_clusters(n, pairs):
+    """
+    Connected components (size >= 2) of the graph formed by the similar pairs.
+    """
+    if not pairs:
+        return []
+    i, j, _ = zip(*pairs)
+    graph = sparse.coo_matrix((np.ones(len(pairs)), (i, j)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+
+    groups = {}
+    for node, label in enumerate(labels):
+        groups.setdefault(label, []).append(node)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def collusion_report(submissions, texts, threshold):
+    """
+    `submissions` and `texts` are parallel lists. Returns similar pairs and clusters
+    (rings of students), most similar first.
+    """
+    start = time.perf_counter()
+    x = tfidf_matrix(texts)
+    pairs = similar_pairs(x, threshold)
+    clusters = find_clusters(len(texts), pairs)
+
+    def describe(index):
+        sub = submissions[index]
+        return {"submission_id": sub.get("id"), "student_email": sub.get("student_email")}
+
+    cluster_reports = []
+    for members in clusters:
+        member_set = set(members)
+        internal = [s for i, j, s in pairs if i in member_set and j in member_set]
+        cluster_reports.append({
+            "members": [describe(m) for m in members],
+            "max_similarity": round(max(internal) * 100, 2),
+            "mean_similarity": round(sum(internal) / len(internal) * 100, 2),
+        })
+    cluster_reports.sort(key=lambda c: (-c["max_similarity"], -len(c["members"])))
+
+    pair_reports = [
+        {"a": describe(i), "b": describe(j), "similarity": round(s * 100, 2)}
+        for i, j, s in sorted(pairs, key=lambda p: -p[2])
+    ]
+
+    return {
+        "threshold": round(threshold * 100, 2),
+        "submissions": len(texts),
+        "pairs": pair_reports,
+        "clusters": cluster_reports,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        "generated_at": time.time(),
+    }
+
+
+def build_assignment_report(assignment_id, threshold):
+    """
+    Collusion report over every submission of an assignment, using the texts kept
+    in the fingerprint index (backfilling any that are missing).
+    """
+    from .fingerprint_index import load_texts
+    from .plagiarism import backfill_fingerprints
+    from .supabase_service import iter_submissions_for_assignment
+
+    columns = "id, student_email, file_url, created_at"
+    submissions = [s for s in iter_submissions_for_assignment(assignment_id, columns=columns) if s.get("file_url")]
+
+    backfill_fingerprints(assignment_id, {s["file_url"] for s in submissions})
+    texts_by_url = load_texts(assignment_id)
+
+    submissions = [s for s in submissions if s["file_url"] in texts_by_url]
+    texts = [texts_by_url[s["file_url"]] for s in submissions]
+    return collusion_report(submissions, texts, threshold)
+
+
+# ---------------- STORED REPORTS ---------------- #
+
+def get_stored_report(assignment_id):
+    blob = get_cache_backend().get(cache_key("collusion", assignment_id))
+    return pickle.loads(blob) if blob is not None else None
+
+
+def refresh_report(assignment_id, threshold=None):
+    """
+    Rebuild an assignment's collusion report and store it for the professor view.
+    """
+    if threshold is None:
+        threshold = current_app.config["COLLUSION_THRESHOLD"]
+    report = build_assignment_report(assignment_id, threshold)
+    ttl = current_app.config["CACHE_TTLS"].get("collusion", 0)
+    if ttl:
+        get_cache_backend().set(cache_key("collusion", assignment_id), pickle.dumps(report), ttl)
+    return report
@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import copy_current_request_context, current_app, g, has_request_context
+from .metrics import merge_server_timing
+
+# Independent Supabase / storage calls within one request run side by side.
+# Under serve.py (gevent, monkey-patched) these threads are greenlets, so a
+# request waiting on the network costs one greenlet rather than an OS thread
+# (SQLite calls still block the whole process; see serve.py).
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=current_app.config["PARALLEL_FETCH_WORKERS"], thread_name_prefix="fetch"
+                )
+    return _pool
+
+
+def _in_app_context(app, call):
+    with app.app_context():
+        return call()
+
+
+def _with_timings(call):
+    # g belongs to the worker's own context; hand its Server-Timing stages back
+    def run():
+        return call(), g.pop("server_timing", {})
+
+    return run
+
+
+def in_parallel(*calls):
+    """
+    Run zero-argument callables concurrently and return their results in order.
+    Each runs in a copy of the current request context (or in the app context
+    outside a request), and the stages it times show up in the request's
+    Server-Timing header. The first exception is re-raised.
+    """
+    app = current_app._get_current_object()
+    pool = _get_pool()
+    futures = []
+    for call in calls[1:]:
+        if has_request_context():
+            futures.append(pool.submit(copy_current_request_context(_with_timings(call))))
+        else:
+            futures.append(pool.submit(_in_app_context, app, _with_timings(call)))
+
+    # the first call runs on the request's own thread
+    results = [calls[0]()] if calls else []
+    for f in futures:
+        result, timings = f.result()
+        merge_server_timing(timings)
+        results.append(result)
+    return results
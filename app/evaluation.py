@@ -1,32 +1,135 @@
-import requests
-import docx
+import hashlib
+import json
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from flask import current_app
-from openai import OpenAI
+from .chunking import chunk_text
+from .text_cache import get_text_cache
+from .evaluation_cache import evaluation_key, get_or_compute
+from .llm_client import get_llm_client
+from .metrics import increment, timed
+from .preprocess import prepare_text
 
-# extract text from docx URL
-def extract_text_from_docx_url(file_url):
-    resp = requests.get(file_url)
-    with open("temp.docx", "wb") as f:
-        f.write(resp.content)
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
 
-    doc = docx.Document("temp.docx")
-    text = "\n".join([p.text for p in doc.paragraphs])
-    return text
 
+def _iter_source(file_url, chunk_size=64 * 1024):
+    # file:// URLs come from the local blob store, and only that store may be read
+    if file_url.startswith("file://"):
+        if current_app.config["STORAGE_BACKEND"] != "local":
+            raise ValueError(f"File URLs are only read with STORAGE_BACKEND = 'local': {file_url}")
+        from .cloudinary_service import local_blob_dir
+        from .local_backends import local_blob_path
 
-def evaluate_assignment_from_url(file_url):
+        with open(local_blob_path(local_blob_dir(), file_url), "rb") as f:
+            yield from iter(lambda: f.read(chunk_size), b"")
+        return
+
+    import requests
+
+    with requests.get(file_url, stream=True, timeout=30) as resp:
+        resp.raise_for_status()
+        yield from resp.iter_content(chunk_size=chunk_size)
+
+
+@timed("download")
+def _download_docx(file_url):
     """
-    Download docx → extract text → send to OpenAI → get:
-    - Score (0–100)
-    - Detailed feedback
-    - Strengths / weaknesses
+    Stream the file into a private spooled buffer (memory until DOCX_SPOOL_BYTES,
+    then an anonymous temp file) while hashing it. Returns (fileobj, sha256).
     """
+    max_bytes = current_app.config["MAX_DOCX_BYTES"]
+    spool = tempfile.SpooledTemporaryFile(max_size=current_app.config["DOCX_SPOOL_BYTES"])
+    digest = hashlib.sha256()
+    size = 0
 
-    text = extract_text_from_docx_url(file_url)
+    try:
+        for chunk in _iter_source(file_url):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ValueError(f"Document exceeds {max_bytes} bytes: {file_url}")
+            digest.update(chunk)
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool, digest.hexdigest()
+
+
+def _paragraph_text(p):
+    parts = []
+    for el in p.iter():
+        if el.tag == _W + "t":
+            parts.append(el.text or "")
+        elif el.tag == _W + "tab":
+            parts.append("\t")
+        elif el.tag in (_W + "br", _W + "cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+
+@timed("parse")
+def extract_text_from_docx_file(fileobj):
+    """
+    Read word/document.xml straight from the zip with an incremental parser.
+    Only top-level body paragraphs are kept, matching python-docx's doc.paragraphs.
+    """
+    paragraphs = []
+    with zipfile.ZipFile(fileobj) as zf, zf.open("word/document.xml") as xml:
+        stack = []
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                stack.append(elem.tag)
+                continue
+            stack.pop()
+            if stack and stack[-1] == _W + "body":
+                if elem.tag == _W + "p":
+                    paragraphs.append(_paragraph_text(elem))
+                elem.clear()
+    return "\n".join(paragraphs)
+
+
+# extract text from docx URL (cached by URL and by file content hash)
+def extract_text_from_docx_url(file_url):
+    cache = get_text_cache()
+    text = cache.get_by_url(file_url)
+    if text is not None:
+        return text
+
+    fileobj, content_hash = _download_docx(file_url)
+    with fileobj:
+        text = cache.get_by_hash(content_hash)
+        if text is not None:
+            cache.link_url(file_url, content_hash)
+            return text
+
+        text = extract_text_from_docx_file(fileobj)
 
-    client = OpenAI(api_key=current_app.config["OPENAI_API_KEY"])
+    cache.put(content_hash, text, url=file_url)
+    return text
+
+
+# extract text from a local .docx whose SHA-256 is already known (cached by hash)
+def extract_text_from_docx_path(path, content_hash):
+    cache = get_text_cache()
+    text = cache.get_by_hash(content_hash)
+    if text is None:
+        with open(path, "rb") as f:
+            text = extract_text_from_docx_file(f)
+        cache.put(content_hash, text)
+    return text
+
+
+# Bump whenever a prompt below (or how they are combined) changes so cached
+# evaluations are not reused.
+PROMPT_VERSION = 2
 
-    prompt = f"""
+PROMPT_TEMPLATE = """
     You are an expert professor. Evaluate the following student assignment.
 
     REQUIREMENTS:
@@ -47,19 +150,181 @@ def evaluate_assignment_from_url(file_url):
     }}
     """
 
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
+CHUNK_PROMPT_TEMPLATE = """
+    You are an expert professor. Below is part {index} of {total} of a long student assignment.
+    Review only this part; another step will combine the reviews of all parts.
+
+    REQUIREMENTS:
+    - Give a score from 0 to 100 for this part (strict but fair)
+    - List its main strengths and weaknesses
+    - Summarize what this part covers in 2–3 sentences
+
+    ASSIGNMENT PART {index}/{total}:
+    ---------------------
+    {text}
+    ---------------------
+
+    Now respond in JSON with EXACT keys:
+    {{
+      "score": number,
+      "strengths": ["string"],
+      "weaknesses": ["string"],
+      "summary": "string"
+    }}
+    """
+
+REDUCE_PROMPT_TEMPLATE = """
+    You are an expert professor. A long student assignment was reviewed in {total} parts.
+    Using the part reviews below, grade the assignment as a whole.
+
+    REQUIREMENTS:
+    - Give a score from 0 to 100 (strict but fair)
+    - Provide detailed feedback (3–5 paragraphs)
+    - Identify strengths and weaknesses
+    - Be formal and helpful
+
+    PART REVIEWS (JSON):
+    ---------------------
+    {findings}
+    ---------------------
+
+    Now respond in JSON with EXACT keys:
+    {{
+      "score": number,
+      "feedback": "string"
+    }}
+    """
+
+
+@timed("llm")
+def _chat_json(client, model, temperature, prompt):
+    response = client.create(
+        model=model,
         messages=[
             {"role": "system", "content": "You are an expert evaluator."},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.2
+        temperature=temperature
+    )
+    return json.loads(response.choices[0].message.content)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def _evaluate_chunks(client, model, temperature, chunks, concurrency):
+    """
+    Map: review every chunk in parallel. Reduce: grade the whole from the reviews.
+    """
+    total = len(chunks)
+    prompts = [
+        CHUNK_PROMPT_TEMPLATE.format(index=i + 1, total=total, text=chunk)
+        for i, chunk in enumerate(chunks)
+    ]
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, total)) as pool:
+        mapped = list(pool.map(lambda p: _timed(_chat_json, client, model, temperature, p), prompts))
+
+    findings = [
+        {
+            "part": i + 1,
+            "score": f.get("score"),
+            "strengths": f.get("strengths", []),
+            "weaknesses": f.get("weaknesses", []),
+            "summary": f.get("summary", ""),
+        }
+        for i, (f, _) in enumerate(mapped)
+    ]
+    result = _chat_json(
+        client,
+        model,
+        temperature,
+        REDUCE_PROMPT_TEMPLATE.format(total=total, findings=json.dumps(findings, indent=2)),
     )
 
-    import json
-    result = json.loads(response.choices[0].message.content)
+    if "score" not in result:
+        # fall back to the length-weighted mean of the part scores
+        weighted = [(f["score"], len(c)) for f, c in zip(findings, chunks) if isinstance(f["score"], (int, float))]
+        if weighted:
+            result["score"] = round(sum(s * w for s, w in weighted) / sum(w for _, w in weighted))
+
+    return result, [latency for _, latency in mapped]
+
 
-    score = result.get("score", 75)
-    feedback = result.get("feedback", "No feedback generated.")
+def _evaluate(text, model, temperature):
+    config = current_app.config
+    client = get_llm_client()
+    chunks = chunk_text(text, config["EVALUATION_CHUNK_TOKENS"], model)
 
-    return score, feedback
+    if len(chunks) <= 1:
+        result, latency = _timed(_chat_json, client, model, temperature, PROMPT_TEMPLATE.format(text=text))
+        latencies = [latency]
+    else:
+        result, latencies = _evaluate_chunks(
+            client, model, temperature, chunks, config["EVALUATION_CHUNK_CONCURRENCY"]
+        )
+
+    return {
+        "score": result.get("score", 75),
+        "feedback": result.get("feedback", "No feedback generated."),
+        "chunks": max(len(chunks), 1),
+        "chunk_latencies_ms": latencies,
+    }
+
+
+@timed("preprocess")
+def preprocess_for_evaluation(text):
+    config = current_app.config
+    return prepare_text(
+        text,
+        config["EVALUATION_TOKEN_BUDGET"],
+        config["EVALUATION_BUDGET_STRATEGY"],
+        config["OPENAI_MODEL"],
+    )
+
+
+def evaluate_text_report(text):
+    """
+    Evaluate extracted assignment text, reusing a stored result for identical
+    (cleaned) text under the same prompt version, model and temperature.
+    Returns score, feedback, chunk count, per-chunk latency and the token
+    counts before and after preprocessing.
+    """
+    model = current_app.config["OPENAI_MODEL"]
+    temperature = current_app.config["OPENAI_TEMPERATURE"]
+    text, tokens = preprocess_for_evaluation(text)
+    increment("grader_prompt_tokens_total", tokens["tokens_after"])
+    increment("grader_prompt_tokens_saved_total", tokens["tokens_saved"])
+    key = evaluation_key(text, PROMPT_VERSION, model, temperature)
+
+    report = get_or_compute(key, lambda: _evaluate(text, model, temperature))
+    current_app.logger.info(
+        "Evaluation: %s chunk(s), latencies %s ms, %s -> %s tokens (%s blocks dropped%s)",
+        report.get("chunks", 1),
+        report.get("chunk_latencies_ms"),
+        tokens["tokens_before"],
+        tokens["tokens_after"],
+        tokens["blocks_dropped"],
+        ", truncated" if tokens["truncated"] else "",
+    )
+    return dict(report, tokens=tokens)
+
+
+def evaluate_text(text):
+    report = evaluate_text_report(text)
+    return report["score"], report["feedback"]
+
+
+def evaluate_assignment_from_url(file_url):
+    """
+    Download docx → extract text → send to OpenAI → get:
+    - Score (0–100)
+    - Detailed feedback
+    - Strengths / weaknesses
+    """
+
+    text = extract_text_from_docx_url(file_url)
+    return evaluate_text(text)
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from flask import current_app
+
+# Evaluations are memoized by (normalized text hash, prompt version, model, temperature).
+# Identical requests running at the same time share one LLM call: threads in a process
+# wait on an Event, other processes wait on a "pending" row until its lease expires.
+
+PENDING, DONE = "pending", "done"
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    return _WS_RE.sub(" ", text or "").strip()
+
+
+def evaluation_key(text, prompt_version, model, temperature):
+    text_hash = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+    return f"{text_hash}:{prompt_version}:{model}:{temperature}"
+
+
+def _connect():
+    path = current_app.config["EVALUATION_CACHE_PATH"]
+    if not os.path.isabs(path):
+        path = os.path.join(current_app.instance_path, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, status TEXT NOT NULL, "
+        "result TEXT, lease_until REAL, created_at REAL NOT NULL)"
+    )
+    return conn
+
+
+def _lookup(conn, key):
+    row = conn.execute("SELECT status, result, lease_until FROM evaluations WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None, None, None
+    result = json.loads(row[1]) if row[1] else None
+    return row[0], result, row[2]
+
+
+def _claim(key):
+    """
+    Returns (result, claimed). claimed=True means this caller must compute the value.
+    """
+    now = time.time()
+    lease = now + current_app.config["EVALUATION_CACHE_LEASE"]
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        status, result, lease_until = _lookup(conn, key)
+        if status == DONE:
+            return result, False
+        if status == PENDING and lease_until and lease_until > now:
+            return None, False
+        conn.execute(
+            "INSERT OR REPLACE INTO evaluations (key, status, result, lease_until, created_at) VALUES (?, ?, NULL, ?, ?)",
+            (key, PENDING, lease, now),
+        )
+    return None, True
+
+
+def _store(key, result):
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE evaluations SET status = ?, result = ?, lease_until = NULL WHERE key = ?",
+            (DONE, json.dumps(result), key),
+        )
+
+
+def _release(key):
+    with _connect() as conn:
+        conn.execute("DELETE FROM evaluations WHERE key = ? AND status = ?", (key, PENDING))
+
+
+def _wait_for_other_process(key):
+    poll = current_app.config["EVALUATION_CACHE_POLL"]
+    while True:
+        time.sleep(poll)
+        with _connect() as conn:
+            status, result, lease_until = _lookup(conn, key)
+        if status == DONE:
+            return result, False
+        if status is None or (lease_until or 0) <= time.time():
+            # owner gave up or died: try to take over
+            result, claimed = _claim(key)
+            if result is not None or claimed:
+                return result, claimed
+
+
+def _get_or_compute_shared(key, compute):
+    result, claimed = _claim(key)
+    if result is not None:
+        return result
+    if not claimed:
+        result, claimed = _wait_for_other_process(key)
+        if not claimed:
+            return result
+
+    try:
+        result = compute()
+    except Exception:
+        _release(key)
+        raise
+    _store(key, result)
+    return result
+
+
+def get_or_compute(key, compute):
+    """
+    Return the cached JSON-serializable result for `key`, computing it at most once
+    across concurrent callers.
+    """
+    with _inflight_lock:
+        entry = _inflight.get(key)
+        owner = entry is None
+        if owner:
+            entry = {"event": threading.Event(), "result": None, "error": None}
+            _inflight[key] = entry
+
+    if not owner:
+        entry["event"].wait()
+        if entry["error"] is not None:
+            raise entry["error"]
+        return entry["result"]
+
+    try:
+        entry["result"] = _get_or_compute_shared(key, compute)
+        return entry["result"]
+    except Exception as e:
+        entry["error"] = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        entry["event"].set()
@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+
+GRADEBOOK_FIELDS = [
+    "assignment_id",
+    "assignment_title",
+    "submission_id",
+    "student_email",
+    "score",
+    "plagiarism_percent",
+    "created_at",
+]
+
+# Columns pulled from Supabase; feedback is deliberately left out of the gradebook.
+GRADEBOOK_COLUMNS = "id, assignment_id, student_email, score, plagiarism_percent, created_at, assignments(title)"
+
+# Spreadsheet apps run text cells starting with these as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+
+
+def gradebook_row(row):
+    assignment = row.get("assignments") or {}
+    return {
+        "assignment_id": row.get("assignment_id"),
+        "assignment_title": assignment.get("title"),
+        "submission_id": row.get("id"),
+        "student_email": row.get("student_email"),
+        "score": row.get("score"),
+        "plagiarism_percent": row.get("plagiarism_percent"),
+        "created_at": row.get("created_at"),
+    }
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _csv_safe(value):
+    # student_email and titles are free text; a leading quote keeps them as text
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows, fields=GRADEBOOK_FIELDS, batch_size=200):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for batch in _batched(rows, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows({k: _csv_safe(v) for k, v in row.items()} for row in batch)
+        yield buffer.getvalue()
+
+
+def iter_jsonl(rows, fields=GRADEBOOK_FIELDS, batch_size=200):
+    for batch in _batched(rows, batch_size):
+        yield "".join(json.dumps({k: row.get(k) for k in fields}, default=str) + "\n" for row in batch)
+
+
+def iter_export(rows, fmt):
+    rows = (gradebook_row(r) for r in rows)
+    return iter_csv(rows) if fmt == "csv" else iter_jsonl(rows)
@@ -0,0 +1,173 @@
+import os
+import sqlite3
+import struct
+import zlib
+from hashlib import blake2b
+import numpy as np
+from flask import current_app
+from .winnowing import kgram_hashes, tokenize
+
+# MinHash / LSH candidate selection over 5-word shingles. A copied paragraph in
+# an otherwise original essay is a Jaccard similarity of only ~0.02, which wider
+# bands would miss, so every band is a single row: 256 bands find a 5% copy
+# ~99% of the time. Candidates are ranked by shared buckets (the Jaccard
+# estimate) and capped, and winnowing (plagiarism.py) verifies each one.
+NUM_PERM = 256
+BANDS = 256
+ROWS = NUM_PERM // BANDS
+_BLOCK = 4096  # shingles hashed per step, bounding memory on long documents
+
+
+def _make_permutations():
+    # fixed seed so signatures stay comparable across processes and restarts
+    a, b = [], []
+    for i in range(NUM_PERM):
+        digest = blake2b(f"grader-minhash-{i}".encode(), digest_size=16).digest()
+        x, y = struct.unpack("<QQ", digest)
+        a.append(x | 1)
+        b.append(y)
+    return np.array(a, dtype=np.uint64)[:, None], np.array(b, dtype=np.uint64)[:, None]
+
+
+_A, _B = _make_permutations()
+
+
+def minhash_signature(text):
+    """
+    NUM_PERM 32-bit MinHash values of the text's 5-word shingles (multiply-shift
+    hashing, vectorized), or None for texts shorter than one shingle.
+    """
+    hashes = np.unique(np.array(kgram_hashes(tokenize(text)[0]), dtype=np.uint64) & np.uint64(0xFFFFFFFF))
+    if not hashes.size:
+        return None
+
+    signature = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for i in range(0, hashes.size, _BLOCK):
+        # uint64 arithmetic wraps, i.e. (a * h + b) mod 2^64; the top 32 bits are the hash
+        block = (_A * hashes[i:i + _BLOCK] + _B) >> np.uint64(32)
+        np.minimum(signature, block.min(axis=1), out=signature)
+    return signature.astype("<u4")
+
+
+def lsh_buckets(signature):
+    buckets = []
+    for band in range(BANDS):
+        digest = blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+# ---------------- INDEX STORAGE ---------------- #
+
+def _index_path():
+    path = current_app.config["FINGERPRINT_INDEX_PATH"]
+    if not os.path.isabs(path):
+        path = os.path.join(current_app.instance_path, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+_schema_ready = set()  # index files whose tables this process has already created
+
+
+def _connect():
+    path = _index_path()
+    conn = sqlite3.connect(path, timeout=30)
+    if path not in _schema_ready:
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                file_url TEXT PRIMARY KEY,
+                assignment_id TEXT NOT NULL,
+                text BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_fingerprints_assignment ON fingerprints (assignment_id);
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                assignment_id TEXT NOT NULL,
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                file_url TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lsh_lookup ON lsh_buckets (assignment_id, band, bucket);
+            CREATE INDEX IF NOT EXISTS idx_lsh_url ON lsh_buckets (file_url);
+            """
+        )
+        _schema_ready.add(path)
+    return conn
+
+
+def indexed_urls(assignment_id):
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT file_url FROM fingerprints WHERE assignment_id = ?", (str(assignment_id),)
+        ).fetchall()
+    return {row[0] for row in rows}
+
+
+def load_texts(assignment_id):
+    """
+    {file_url: text} for every indexed submission of an assignment.
+    """
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT file_url, text FROM fingerprints WHERE assignment_id = ?", (str(assignment_id),)
+        ).fetchall()
+    return {url: zlib.decompress(blob).decode() for url, blob in rows}
+
+
+def get_text(file_url):
+    with _connect() as conn:
+        row = conn.execute("SELECT text FROM fingerprints WHERE file_url = ?", (file_url,)).fetchone()
+    return zlib.decompress(row[0]).decode() if row else None
+
+
+def add_fingerprint(assignment_id, file_url, text, signature=None):
+    """
+    Store the LSH buckets and compressed text of one submission.
+    """
+    assignment_id = str(assignment_id)
+    if signature is None:
+        signature = minhash_signature(text)
+
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO fingerprints (file_url, assignment_id, text) VALUES (?, ?, ?)",
+            (file_url, assignment_id, zlib.compress((text or "").encode())),
+        )
+        conn.execute("DELETE FROM lsh_buckets WHERE file_url = ?", (file_url,))
+        if signature is not None:
+            conn.executemany(
+                "INSERT INTO lsh_buckets (assignment_id, band, bucket, file_url) VALUES (?, ?, ?, ?)",
+                [(assignment_id, band, key, file_url) for band, key in lsh_buckets(signature)],
+            )
+
+
+def query_candidates(assignment_id, signature, limit):
+    """
+    Return {file_url: text} for the `limit` indexed submissions sharing the most
+    LSH buckets with `signature`. A single shared bucket is enough to qualify.
+    """
+    assignment_id = str(assignment_id)
+    if signature is None:
+        return {}
+
+    with _connect() as conn:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS probe (band INTEGER, bucket INTEGER, PRIMARY KEY (band, bucket))")
+        conn.execute("DELETE FROM probe")
+        conn.executemany("INSERT INTO probe (band, bucket) VALUES (?, ?)", lsh_buckets(signature))
+        rows = conn.execute(
+            """
+            SELECT f.file_url, f.text FROM fingerprints f
+            JOIN (
+                SELECT l.file_url, COUNT(*) AS shared FROM lsh_buckets l
+                JOIN probe ON probe.band = l.band AND probe.bucket = l.bucket
+                WHERE l.assignment_id = ?
+                GROUP BY l.file_url
+                ORDER BY shared DESC
+                LIMIT ?
+            ) best ON best.file_url = f.file_url
+            """,
+            (assignment_id, limit),
+        ).fetchall()
+
+    return {url: zlib.decompress(blob).decode() for url, blob in rows}
@@ -0,0 +1,349 @@
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.utils import secure_filename
+from .llm_client import CircuitOpenError
+from .metrics import flush, timed
+
+# Job lifecycle: queued -> running -> done | failed (running jobs are retried by
+# requeueing them with backoff; a crashed worker's job is reclaimed once its lease expires)
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class LeaseLostError(RuntimeError):
+    """The job's lease expired and another worker claimed it (or finished it)."""
+
+
+def _instance_path(name):
+    path = current_app.config[name]
+    if not os.path.isabs(path):
+        path = os.path.join(current_app.instance_path, path)
+    return path
+
+
+_schema_ready = set()  # queue files whose table this process has already created
+
+
+def _connect():
+    path = _instance_path("GRADING_QUEUE_PATH")
+    if path not in _schema_ready:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if path not in _schema_ready:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS grading_jobs (
+                id TEXT PRIMARY KEY,
+                assignment_id TEXT NOT NULL,
+                student_email TEXT NOT NULL,
+                local_path TEXT,
+                content_hash TEXT,
+                file_url TEXT,
+                score REAL,
+                feedback TEXT,
+                plagiarism REAL,
+                plagiarism_matches TEXT,
+                tokens_before INTEGER,
+                tokens_after INTEGER,
+                submission_id TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                available_at REAL NOT NULL,
+                lease_until REAL,
+                claim_token TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON grading_jobs (status, available_at)")
+        _schema_ready.add(path)
+    return conn
+
+
+def _update(job_id, **fields):
+    fields["updated_at"] = time.time()
+    assignments = ", ".join(f"{k} = ?" for k in fields)
+    conn = _connect()
+    try:
+        conn.execute(f"UPDATE grading_jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+    finally:
+        conn.close()
+
+
+def _update_held(job, **fields):
+    """
+    Update a job only while this worker's claim on it stands. Returns False when
+    another worker has reclaimed it or it is no longer running.
+    """
+    fields["updated_at"] = time.time()
+    assignments = ", ".join(f"{k} = ?" for k in fields)
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            f"UPDATE grading_jobs SET {assignments} WHERE id = ? AND claim_token = ? AND status = ?",
+            [*fields.values(), job["id"], job["claim_token"], RUNNING],
+        )
+    finally:
+        conn.close()
+    return cursor.rowcount > 0
+
+
+def _checkpoint(job, **fields):
+    # persist a stage's output and extend the lease, so a slow but healthy job
+    # is not reclaimed between stages
+    lease_until = time.time() + current_app.config["GRADING_JOB_LEASE"]
+    if not _update_held(job, lease_until=lease_until, **fields):
+        raise LeaseLostError(f"Grading job {job['id']} was reclaimed by another worker")
+
+
+# ---------------- PRODUCER ---------------- #
+
+def enqueue_grading_job(assignment_id, student_email, file):
+    """
+    Save the uploaded FileStorage locally and queue it for grading. Returns the job id.
+    """
+    job_id = uuid.uuid4().hex
+    upload_dir = _instance_path("GRADING_UPLOAD_DIR")
+    os.makedirs(upload_dir, exist_ok=True)
+    local_path = os.path.join(upload_dir, f"{job_id}-{secure_filename(file.filename) or 'upload.docx'}")
+
+    # single pass over the upload stream: write it out and hash it
+    digest = hashlib.sha256()
+    with open(local_path, "wb") as out:
+        for chunk in iter(lambda: file.stream.read(64 * 1024), b""):
+            digest.update(chunk)
+            out.write(chunk)
+
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            """
+            INSERT INTO grading_jobs
+                (id, assignment_id, student_email, local_path, content_hash, status, available_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (job_id, str(assignment_id), student_email, local_path, digest.hexdigest(), QUEUED, now, now, now),
+        )
+    finally:
+        conn.close()
+    return job_id
+
+
+def get_job(job_id):
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM grading_jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+# ---------------- CONSUMER ---------------- #
+
+def claim_next_job():
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            """
+            SELECT * FROM grading_jobs
+            WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?)
+            ORDER BY created_at
+            LIMIT 1
+            """,
+            (QUEUED, now, RUNNING, now),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+
+        token = uuid.uuid4().hex
+        conn.execute(
+            """
+            UPDATE grading_jobs SET status = ?, attempts = attempts + 1, lease_until = ?, claim_token = ?, updated_at = ?
+            WHERE id = ?
+            """,
+            (RUNNING, now + current_app.config["GRADING_JOB_LEASE"], token, now, row["id"]),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    job = dict(row)
+    job["attempts"] += 1
+    job["claim_token"] = token
+    return job
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _upload_in_app_context(app, path):
+    with app.app_context():
+        from .cloudinary_service import upload_docx_to_cloudinary
+        return upload_docx_to_cloudinary(path)
+
+
+def process_job(job):
+    """
+    Run the grading stages, persisting each stage's output so a retry resumes after it.
+    Text is extracted from the local upload, and the storage upload runs alongside
+    evaluation, so the file is never downloaded back.
+    """
+    from .evaluation import evaluate_text_report, extract_text_from_docx_path
+    from .plagiarism import plagiarism_report
+    from .supabase_service import add_submission
+    from .text_cache import get_text_cache
+
+    job_id = job["id"]
+    if not job["content_hash"]:
+        job["content_hash"] = _hash_file(job["local_path"])
+        _checkpoint(job, content_hash=job["content_hash"])
+    text = extract_text_from_docx_path(job["local_path"], job["content_hash"])
+
+    upload = None
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        if not job["file_url"]:
+            upload = pool.submit(_upload_in_app_context, current_app._get_current_object(), job["local_path"])
+
+        try:
+            if job["score"] is None:
+                evaluation = evaluate_text_report(text)
+                job["score"], job["feedback"] = evaluation["score"], evaluation["feedback"]
+                _checkpoint(
+                    job,
+                    score=job["score"],
+                    feedback=job["feedback"],
+                    tokens_before=evaluation["tokens"]["tokens_before"],
+                    tokens_after=evaluation["tokens"]["tokens_after"],
+                )
+        finally:
+            # keep a finished upload even if evaluation failed, so a retry skips it
+            if upload is not None:
+                job["file_url"] = upload.result()
+                _checkpoint(job, file_url=job["file_url"])
+
+    # later extractions by URL (regrades, plagiarism backfill) hit the cache
+    get_text_cache().link_url(job["file_url"], job["content_hash"])
+
+    if job["plagiarism"] is None:
+        report = plagiarism_report(job["assignment_id"], job["file_url"], text)
+        job["plagiarism"] = report["percent"]
+        job["plagiarism_matches"] = json.dumps(report["matches"])
+        _checkpoint(job, plagiarism=job["plagiarism"], plagiarism_matches=job["plagiarism_matches"])
+
+    # a retry after the insert must not store the submission (or count it in the stats) twice
+    if not job["submission_id"]:
+        # the claim is checked and the lease renewed right before the insert, so a
+        # worker whose lease ran out stops here instead of inserting a duplicate
+        _checkpoint(job)
+        submission_id = add_submission(
+            job["assignment_id"],
+            job["student_email"],
+            job["file_url"],
+            job["score"],
+            job["plagiarism"],
+            job["feedback"],
+            json.loads(job["plagiarism_matches"]) if job["plagiarism_matches"] else None,
+        )
+        job["submission_id"] = str(submission_id)
+    # unconditional: once the row exists the job is done, whoever holds the claim
+    _update(job_id, submission_id=job["submission_id"], status=DONE, lease_until=None, last_error=None)
+
+    _warm_reports(job["assignment_id"], job["submission_id"])
+
+    _remove_upload(job)
+
+
+def _remove_upload(job):
+    if job["local_path"] and os.path.exists(job["local_path"]):
+        os.remove(job["local_path"])
+
+
+def _warm_reports(assignment_id, submission_id):
+    # pre-render PDFs here so the first download is a cache hit
+    from .reports import warm_reports
+    from .supabase_service import get_assignment, get_submission
+
+    try:
+        submission = get_submission(submission_id)
+        if submission:
+            warm_reports(get_assignment(assignment_id) or {}, submission)
+    except Exception:
+        current_app.logger.exception("Could not pre-render reports for submission %s", submission_id)
+
+
+def fail_job(job, error):
+    # a worker whose lease ran out leaves the job to the worker that reclaimed it
+    if job["attempts"] >= current_app.config["GRADING_MAX_ATTEMPTS"]:
+        if _update_held(job, status=FAILED, lease_until=None, last_error=str(error)):
+            _remove_upload(job)
+        return
+
+    # jittered exponential backoff
+    delay = current_app.config["GRADING_RETRY_BACKOFF"] * 2 ** (job["attempts"] - 1)
+    delay *= random.uniform(0.5, 1.5)
+    _update_held(
+        job,
+        status=QUEUED,
+        lease_until=None,
+        available_at=time.time() + delay,
+        last_error=str(error),
+    )
+
+
+def defer_job(job, delay, reason):
+    # the LLM circuit is open: requeue without spending one of the job's attempts
+    _update_held(
+        job,
+        status=QUEUED,
+        attempts=job["attempts"] - 1,
+        lease_until=None,
+        available_at=time.time() + delay,
+        last_error=reason,
+    )
+
+
+def run_worker(poll_interval=1.0, stop_after=None, stop_event=None):
+    """
+    Claim and process jobs until stopped. Must run inside an app context.
+    """
+    processed = 0
+    while (stop_after is None or processed < stop_after) and not (stop_event and stop_event.is_set()):
+        job = claim_next_job()
+        if job is None:
+            flush()
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            with timed("grading_job"):
+                process_job(job)
+        except LeaseLostError as e:
+            current_app.logger.warning("Grading job %s abandoned: %s", job["id"], e)
+        except CircuitOpenError as e:
+            current_app.logger.warning("Grading job %s deferred: %s", job["id"], e)
+            defer_job(job, e.retry_in, str(e))
+        except Exception as e:
+            current_app.logger.exception("Grading job %s failed", job["id"])
+            fail_job(job, e)
+        processed += 1
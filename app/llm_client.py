@@ -0,0 +1,221 @@
+"""
+Shared LLM client: one per process, used by every evaluation thread.
+
+- TokenBucket caps the request rate (LLM_REQUESTS_PER_MINUTE, per process).
+- AdaptiveLimiter caps calls in flight with AIMD: +1 slot per window of successes,
+  halved on a 429 or when latency passes LLM_TARGET_LATENCY.
+- Retryable failures (429, 408/409, 5xx, timeouts, connection errors) are retried
+  with jittered exponential backoff, honouring Retry-After.
+- CircuitBreaker fails fast with CircuitOpenError after LLM_BREAKER_FAILURES
+  consecutive failures (5xx, timeouts, connection errors; not 429s), then lets
+  one trial call through after LLM_BREAKER_COOLDOWN.
+"""
+import os
+import random
+import threading
+import time
+from flask import current_app
+from .metrics import increment
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, retry_in):
+        super().__init__(f"LLM circuit open; retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def _status_code(error):
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def _is_retryable(error):
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return _status_code(error) in RETRYABLE_STATUS
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------- RATE AND CONCURRENCY ---------------- #
+
+class TokenBucket:
+    def __init__(self, rate_per_second, burst):
+        self.rate = rate_per_second
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial, minimum, maximum, target_latency):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency=None, throttled=False):
+        with self.cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            overloaded = throttled or (self.target_latency and latency and latency > self.target_latency)
+            if overloaded:
+                # calls already in flight report the same overload; cut once per window
+                if now - self.last_decrease > (latency or 1.0):
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self.last_decrease = now
+            elif latency is not None:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError while open. Returns True when the caller holds the
+        half-open trial and must pass trial=True to record().
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or self.trial_in_flight:
+                raise CircuitOpenError(max(remaining, 1.0))
+            self.trial_in_flight = True  # half-open: one trial call
+            return True
+
+    def record(self, success, trial=False):
+        # success None: the provider is throttling, not failing; leave the count alone
+        with self.lock:
+            if trial:
+                self.trial_in_flight = False
+            elif self.opened_at is not None:
+                # a call that started before the circuit opened; only the trial decides
+                return
+            if success is None:
+                return
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+# ---------------- CLIENT ---------------- #
+
+class LLMClient:
+    def __init__(self, backend, config):
+        self.backend = backend
+        self.bucket = TokenBucket(config["LLM_REQUESTS_PER_MINUTE"] / 60, config["LLM_BURST"])
+        self.limiter = AdaptiveLimiter(
+            config["LLM_INITIAL_CONCURRENCY"],
+            config["LLM_MIN_CONCURRENCY"],
+            config["LLM_MAX_CONCURRENCY"],
+            config["LLM_TARGET_LATENCY"],
+        )
+        self.breaker = CircuitBreaker(config["LLM_BREAKER_FAILURES"], config["LLM_BREAKER_COOLDOWN"])
+        self.max_retries = config["LLM_MAX_RETRIES"]
+        self.backoff = config["LLM_RETRY_BACKOFF"]
+        self.max_backoff = config["LLM_MAX_BACKOFF"]
+
+    def create(self, **kwargs):
+        """
+        chat.completions.create through the limiter, retries and breaker.
+        """
+        attempt = 0
+        while True:
+            trial = self.breaker.before_call()
+            self.bucket.acquire()
+            self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = self.backend.chat.completions.create(**kwargs)
+            except Exception as e:
+                retryable = _is_retryable(e)
+                throttled = _status_code(e) == 429
+                self.limiter.release(throttled=throttled)
+                self.breaker.record(success=None if throttled else not retryable, trial=trial)
+                increment("grader_llm_errors_total", status=_status_code(e) or type(e).__name__)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = _retry_after(e) or min(self.max_backoff, self.backoff * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                attempt += 1
+                continue
+
+            self.limiter.release(latency=time.monotonic() - start)
+            self.breaker.record(success=True, trial=trial)
+            return response
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def _create_backend(config):
+    if config["LLM_BACKEND"] == "mock":
+        from .local_backends import MockOpenAI
+        return MockOpenAI(
+            latency=config["MOCK_LLM_LATENCY"],
+            jitter=config["MOCK_LLM_JITTER"],
+            max_concurrency=config["MOCK_LLM_MAX_CONCURRENCY"],
+        )
+
+    from openai import OpenAI
+    # retries are handled here, not by the SDK
+    return OpenAI(api_key=config["OPENAI_API_KEY"], max_retries=0, timeout=config["LLM_TIMEOUT"])
+
+
+def get_llm_client():
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = LLMClient(_create_backend(current_app.config), current_app.config)
+                _client_pid = pid
+    return _client
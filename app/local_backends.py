@@ -0,0 +1,311 @@
+"""
+Local stand-ins for the external services, for offline load tests and capacity planning:
+
+- LocalSupabaseClient: SQLite-backed table store speaking the subset of the
+  supabase-py query builder that supabase_service uses.
+- save_local_blob: filesystem blob store in place of Cloudinary (file:// URLs).
+- MockOpenAI: deterministic chat-completions stand-in with configurable latency.
+
+Selected with DATA_BACKEND / STORAGE_BACKEND / LLM_BACKEND = "local" / "local" / "mock".
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from urllib.parse import quote, unquote, urlparse
+from werkzeug.utils import secure_filename
+
+
+# ---------------- TABLE STORE ---------------- #
+
+_NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def _coerce(a, b):
+    # PostgREST filter values arrive as strings; compare numbers as numbers
+    if a is None or b is None:
+        return a, b
+    if _NUMBER_RE.match(str(a)) and _NUMBER_RE.match(str(b)):
+        return float(a), float(b)
+    return str(a), str(b)
+
+
+def _compare(op, a, b):
+    if op == "is":
+        return a is None if str(b).lower() == "null" else a is not None
+    a, b = _coerce(a, b)
+    if a is None or b is None:
+        return False
+    return {
+        "eq": a == b,
+        "neq": a != b,
+        "gt": a > b,
+        "gte": a >= b,
+        "lt": a < b,
+        "lte": a <= b,
+    }[op]
+
+
+def _split_top_level(expr):
+    parts, depth, quoted, current = [], 0, False, []
+    for ch in expr:
+        if ch == '"' and (not current or current[-1] != "\\"):
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _parse_condition(term):
+    """Turn one PostgREST logic-tree term into a predicate over a row."""
+    term = term.strip()
+    for combinator, fn in (("and(", all), ("or(", any)):
+        if term.startswith(combinator) and term.endswith(")"):
+            subs = [_parse_condition(t) for t in _split_top_level(term[len(combinator):-1])]
+            return lambda row, subs=subs, fn=fn: fn(s(row) for s in subs)
+
+    column, op, value = term.split(".", 2)
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return lambda row: _compare(op, row.get(column), value)
+
+
+def _parse_columns(columns):
+    plain, embeds = [], {}
+    for part in _split_top_level(columns):
+        part = part.strip()
+        if "(" in part:
+            name, inner = part[:-1].split("(", 1)
+            embeds[name.strip()] = [c.strip() for c in inner.split(",")]
+        elif part:
+            plain.append(part)
+    return plain, embeds
+
+
+class _Query:
+    def __init__(self, store, table):
+        self.store = store
+        self.table = table
+        self.columns = "*"
+        self.conditions = []
+        self.eq_filters = []
+        self.orders = []
+        self.row_limit = None
+        self.action = "select"
+        self.payload = None
+
+    # builder methods used by supabase_service
+    def select(self, columns="*", **kwargs):
+        self.columns = columns
+        return self
+
+    def eq(self, column, value):
+        self.eq_filters.append((column, value))
+        self.conditions.append(lambda row: _compare("eq", row.get(column), value))
+        return self
+
+    def or_(self, filters):
+        self.conditions.append(_parse_condition(f"or({filters})"))
+        return self
+
+    def order(self, column, desc=False, nullsfirst=None):
+        self.orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size):
+        self.row_limit = size
+        return self
+
+    def insert(self, data):
+        self.action, self.payload = "insert", data
+        return self
+
+    def upsert(self, data, on_conflict="id", **kwargs):
+        self.action, self.payload = "upsert", data
+        return self
+
+    def execute(self):
+        if self.action == "select":
+            return SimpleNamespace(data=self._select())
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        return SimpleNamespace(data=self.store.write(self.table, rows, upsert=self.action == "upsert"))
+
+    def _select(self):
+        rows = [r for r in self.store.scan(self.table, self.eq_filters) if all(c(r) for c in self.conditions)]
+
+        # apply sort keys last-to-first so the first key wins (sorts are stable)
+        for column, desc, nullsfirst in reversed(self.orders):
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: _coerce(r[column], r[column])[0], reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+
+        if self.row_limit is not None:
+            rows = rows[:self.row_limit]
+
+        plain, embeds = _parse_columns(self.columns)
+        result = []
+        for row in rows:
+            out = dict(row) if "*" in plain or not plain else {c: row.get(c) for c in plain}
+            for name, cols in embeds.items():
+                # to-one embed through the "<singular>_id" foreign key
+                parent = self.store.get(name, row.get(f"{name.rstrip('s')}_id"))
+                out[name] = {c: parent.get(c) for c in cols} if parent else None
+            result.append(out)
+        return result
+
+
+class LocalSupabaseClient:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rows (tbl TEXT NOT NULL, id INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (tbl, id))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def scan(self, table, eq_filters):
+        sql = "SELECT data FROM rows WHERE tbl = ?"
+        params = [table]
+        for column, value in eq_filters:
+            sql += " AND CAST(json_extract(data, ?) AS TEXT) = ?"
+            params += [f"$.{column}", str(value)]
+        with self._connect() as conn:
+            return [json.loads(r[0]) for r in conn.execute(sql, params)]
+
+    def get(self, table, row_id):
+        if row_id is None:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM rows WHERE tbl = ? AND id = ?", (table, int(row_id))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write(self, table, rows, upsert=False):
+        written = []
+        with self._lock, self._connect() as conn:
+            for row in rows:
+                row = dict(row)
+                existing = None
+                if upsert and row.get("id") is not None:
+                    found = conn.execute(
+                        "SELECT data FROM rows WHERE tbl = ? AND id = ?", (table, int(row["id"]))
+                    ).fetchone()
+                    existing = json.loads(found[0]) if found else None
+                if existing:
+                    existing.update(row)
+                    row = existing
+                else:
+                    if row.get("id") is None:
+                        (max_id,) = conn.execute("SELECT MAX(id) FROM rows WHERE tbl = ?", (table,)).fetchone()
+                        row["id"] = (max_id or 0) + 1
+                    row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+                conn.execute(
+                    "INSERT OR REPLACE INTO rows (tbl, id, data) VALUES (?, ?, ?)",
+                    (table, int(row["id"]), json.dumps(row)),
+                )
+                written.append(row)
+        return written
+
+
+# ---------------- BLOB STORE ---------------- #
+
+def save_local_blob(directory, file):
+    """
+    Copy a path or file-like upload into `directory`; returns a file:// URL.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = getattr(file, "filename", None) or (file if isinstance(file, str) else "upload.docx")
+    path = os.path.join(directory, f"{uuid.uuid4().hex}-{secure_filename(os.path.basename(name))}")
+
+    if isinstance(file, str):
+        shutil.copyfile(file, path)
+    else:
+        with open(path, "wb") as out:
+            shutil.copyfileobj(getattr(file, "stream", file), out)
+    return "file://" + quote(os.path.abspath(path))
+
+
+def local_blob_path(directory, file_url):
+    """
+    Filesystem path of a file:// URL from save_local_blob. URLs that point
+    outside `directory` are rejected.
+    """
+    root = os.path.realpath(directory)
+    path = os.path.realpath(unquote(urlparse(file_url).path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"File URL is outside the local blob store: {file_url}")
+    return path
+
+
+# ---------------- MOCK LLM ---------------- #
+
+class MockRateLimitError(Exception):
+    status_code = 429
+
+
+class MockOpenAI:
+    """
+    Deterministic stand-in for OpenAI(...).chat.completions.create: the score is
+    derived from a hash of the prompt, latency is sampled around `latency`.
+    With `max_concurrency`, calls beyond that many in flight get a 429.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, max_concurrency=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, temperature=0, **kwargs):
+        with self._lock:
+            if self.max_concurrency and self._in_flight >= self.max_concurrency:
+                raise MockRateLimitError("Rate limit reached (mock)")
+            self._in_flight += 1
+        try:
+            if self.latency:
+                time.sleep(max(0.0, random.uniform(self.latency - self.jitter, self.latency + self.jitter)))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        prompt = messages[-1]["content"]
+        digest = hashlib.sha256(prompt.encode()).digest()
+        score = 50 + digest[0] % 50
+        body = {
+            "score": score,
+            "feedback": f"Mock evaluation ({model}): prompt of {len(prompt)} characters scored {score}.",
+            "strengths": ["mock strength"],
+            "weaknesses": ["mock weakness"],
+            "summary": "Mock summary.",
+        }
+        message = SimpleNamespace(content=json.dumps(body))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
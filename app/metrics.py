@@ -0,0 +1,299 @@
+"""
+Stage timers and counters.
+
+- timed("stage") wraps a block or function: its duration goes into the
+  grader_stage_seconds histogram and, inside a request, the Server-Timing header.
+- Every process aggregates in memory and periodically flushes a snapshot to
+  METRICS_PATH, so /metrics on the web app also covers the grading workers.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from flask import Response, abort, current_app, g, has_app_context, has_request_context, request
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_HELP = {
+    "grader_stage_seconds": ("histogram", "Time spent in one stage (upload, download, parse, llm, plagiarism, supabase.*)."),
+    "grader_stage_errors_total": ("counter", "Stages that raised."),
+    "grader_llm_errors_total": ("counter", "Failed LLM calls by HTTP status or exception type (each retry counts)."),
+    "grader_http_request_seconds": ("histogram", "HTTP request latency by endpoint and status."),
+    "grader_text_cache_lookups_total": ("counter", "Extracted-text cache lookups by result (hits, disk_hits, misses)."),
+    "grader_text_cache_evictions_total": ("counter", "Texts evicted from the text cache, by tier (memory, disk)."),
+    "grader_supabase_client_events_total": ("counter", "Supabase client events (clients_created, connections_opened, requests)."),
+}
+
+
+# ---------------- PER-PROCESS REGISTRY ---------------- #
+
+class _Registry:
+    def __init__(self):
+        self.pid = os.getpid()
+        self.process_id = uuid.uuid4().hex
+        self.lock = threading.Lock()
+        self.histograms = {}  # key -> [bucket counts..., +Inf count, sum]
+        self.counters = {}  # key -> value
+        self.last_flush = 0.0
+        self.flushed = None  # totals at the last flush
+        self.retired = None  # part of the totals already folded into the retired row
+
+    def snapshot(self):
+        with self.lock:
+            return {"histograms": {k: list(v) for k, v in self.histograms.items()}, "counters": dict(self.counters)}
+
+
+_registry = _Registry()
+_registry_lock = threading.Lock()
+
+
+def _get_registry():
+    global _registry
+    if _registry.pid != os.getpid():
+        with _registry_lock:
+            # a forked worker starts its own series instead of re-reporting its parent's
+            if _registry.pid != os.getpid():
+                _registry = _Registry()
+    return _registry
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+def observe(name, seconds, **labels):
+    registry = _get_registry()
+    key = _key(name, labels)
+    with registry.lock:
+        row = registry.histograms.get(key)
+        if row is None:
+            row = registry.histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                row[i] += 1
+        row[len(BUCKETS)] += 1
+        row[-1] += seconds
+    _maybe_flush(registry)
+
+
+def increment(name, amount=1, **labels):
+    registry = _get_registry()
+    key = _key(name, labels)
+    with registry.lock:
+        registry.counters[key] = registry.counters.get(key, 0) + amount
+    _maybe_flush(registry)
+
+
+@contextmanager
+def timed(stage):
+    """
+    Time a block (`with timed("llm"):`) or a function (`@timed("supabase.get_submission")`).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        increment("grader_stage_errors_total", stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("grader_stage_seconds", elapsed, stage=stage)
+        merge_server_timing({stage: elapsed})
+
+
+def merge_server_timing(timings):
+    """
+    Add {stage: seconds} to the current request's Server-Timing header.
+    """
+    if timings and has_request_context():
+        totals = g.setdefault("server_timing", {})
+        for stage, seconds in timings.items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+
+
+# ---------------- SHARED SNAPSHOTS ---------------- #
+
+def _metrics_path():
+    path = current_app.config["METRICS_PATH"]
+    if path and not os.path.isabs(path):
+        path = os.path.join(current_app.instance_path, path)
+    return path
+
+
+# Snapshots of processes that stopped flushing are folded into this one row, so
+# the table does not grow with every restart and the totals never go backwards.
+RETIRED = "retired"
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS snapshots (process_id TEXT PRIMARY KEY, updated_at REAL NOT NULL, data TEXT NOT NULL)"
+    )
+    return conn
+
+
+def _merge(totals, snap, sign=1):
+    for key, row in snap["histograms"].items():
+        merged = totals["histograms"].setdefault(key, [0] * len(row))
+        for i, value in enumerate(row):
+            merged[i] += sign * value
+    for key, value in snap["counters"].items():
+        totals["counters"][key] = totals["counters"].get(key, 0) + sign * value
+    return totals
+
+
+def _fold_stale(conn, now):
+    stale = conn.execute(
+        "SELECT process_id, data FROM snapshots WHERE process_id != ? AND updated_at < ?",
+        (RETIRED, now - current_app.config["METRICS_RETENTION"]),
+    ).fetchall()
+    if not stale:
+        return
+    row = conn.execute("SELECT data FROM snapshots WHERE process_id = ?", (RETIRED,)).fetchone()
+    retired = json.loads(row[0]) if row else {"histograms": {}, "counters": {}}
+    for _, data in stale:
+        _merge(retired, json.loads(data))
+    conn.executemany("DELETE FROM snapshots WHERE process_id = ?", [(pid,) for pid, _ in stale])
+    conn.execute(
+        "INSERT OR REPLACE INTO snapshots (process_id, updated_at, data) VALUES (?, ?, ?)",
+        (RETIRED, now, json.dumps(retired)),
+    )
+
+
+def flush(force=False):
+    """
+    Write this process's totals to METRICS_PATH (at most every METRICS_FLUSH_INTERVAL
+    seconds unless forced), folding snapshots older than METRICS_RETENTION into
+    the retired row. Needs an app context.
+    """
+    registry = _get_registry()
+    path = _metrics_path()
+    now = time.time()
+    if not path or (not force and now - registry.last_flush < current_app.config["METRICS_FLUSH_INTERVAL"]):
+        return
+    registry.last_flush = now
+    totals = registry.snapshot()
+
+    try:
+        conn = _connect(path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            own = conn.execute("SELECT 1 FROM snapshots WHERE process_id = ?", (registry.process_id,)).fetchone()
+            if own is None and registry.flushed is not None:
+                # this process sat idle past the retention window and was folded;
+                # everything it had flushed is in the retired row now
+                registry.retired = registry.flushed
+            data = _merge(_merge({"histograms": {}, "counters": {}}, totals), registry.retired, -1) if registry.retired else totals
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (process_id, updated_at, data) VALUES (?, ?, ?)",
+                (registry.process_id, now, json.dumps(data)),
+            )
+            _fold_stale(conn, now)
+            conn.execute("COMMIT")
+            registry.flushed = totals
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        current_app.logger.exception("Could not flush metrics to %s", path)
+
+
+def _maybe_flush(registry):
+    if has_app_context() and time.time() - registry.last_flush >= current_app.config["METRICS_FLUSH_INTERVAL"]:
+        flush()
+
+
+def collect():
+    """
+    Totals across every process that has flushed (or just this one without METRICS_PATH).
+    """
+    path = _metrics_path()
+    if not path:
+        return _get_registry().snapshot()
+
+    flush(force=True)
+    conn = _connect(path)
+    try:
+        snapshots = [json.loads(row[0]) for row in conn.execute("SELECT data FROM snapshots")]
+    finally:
+        conn.close()
+
+    totals = {"histograms": {}, "counters": {}}
+    for snap in snapshots:
+        _merge(totals, snap)
+    return totals
+
+
+# ---------------- EXPOSITION ---------------- #
+
+def _labels(pairs, extra=()):
+    items = [*pairs, *extra]
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def render_prometheus(totals):
+    series = {}
+    for key, row in totals["histograms"].items():
+        name, pairs = json.loads(key)
+        lines = series.setdefault(name, [])
+        for bound, count in zip(BUCKETS, row):
+            lines.append(f"{name}_bucket{_labels(pairs, [('le', repr(bound))])} {count}")
+        lines.append(f"{name}_bucket{_labels(pairs, [('le', '+Inf')])} {row[len(BUCKETS)]}")
+        lines.append(f"{name}_sum{_labels(pairs)} {row[-1]:.6f}")
+        lines.append(f"{name}_count{_labels(pairs)} {row[len(BUCKETS)]}")
+    for key, value in totals["counters"].items():
+        name, pairs = json.loads(key)
+        series.setdefault(name, []).append(f"{name}{_labels(pairs)} {value}")
+
+    out = []
+    for name in sorted(series):
+        kind, text = _HELP.get(name, ("untyped", name))
+        out += [f"# HELP {name} {text}", f"# TYPE {name} {kind}", *series[name]]
+    return "\n".join(out) + "\n"
+
+
+def server_timing_header(timings, total):
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# ---------------- FLASK WIRING ---------------- #
+
+def init_app(app):
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+        total = time.perf_counter() - started
+        observe(
+            "grader_http_request_seconds",
+            total,
+            endpoint=request.endpoint or "unmatched",
+            status=response.status_code,
+        )
+        if app.config["SERVER_TIMING"]:
+            response.headers["Server-Timing"] = server_timing_header(g.pop("server_timing", {}), total)
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        token = app.config["METRICS_TOKEN"]
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            abort(403)
+        return Response(render_prometheus(collect()), mimetype="text/plain; version=0.0.4")
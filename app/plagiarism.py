@@ -1,31 +1,94 @@
-from difflib import SequenceMatcher
+from flask import current_app
 from .evaluation import extract_text_from_docx_url
-from .supabase_service import get_submissions_for_assignment
+from .fingerprint_index import add_fingerprint, indexed_urls, minhash_signature, query_candidates
+from .metrics import timed
+from .supabase_service import iter_submissions_for_assignment
+from .winnowing import fingerprints, match_spans, merge_ranges, tokenize
 
-def similarity(a: str, b: str) -> float:
-    return SequenceMatcher(None, a, b).ratio()
+EXCERPT_CHARS = 240
+# only what a match needs; feedback and earlier matches are never loaded
+SOURCE_COLUMNS = "id, student_email, file_url, created_at"
 
-def calculate_plagiarism_for_assignment(assignment_id: str, new_file_url: str) -> float:
+def similarity(a: str, b: str) -> float:
     """
-    Compare new submission with previous ones for the same assignment (Supabase).
+    Share of the words of `a` that lie in passages shared with `b`.
     """
-    previous_submissions = get_submissions_for_assignment(assignment_id)
-    if not previous_submissions:
+    words_a, _ = tokenize(a)
+    if not words_a:
         return 0.0
+    spans = match_spans(words_a, tokenize(b)[0])
+    return sum(end - start for start, end in merge_ranges([s[:2] for s in spans])) / len(words_a)
 
-    new_text = extract_text_from_docx_url(new_file_url)
-    max_sim = 0.0
-
-    for _, sub in previous_submissions.items():
-        url = sub.get("file_url")
-        if not url:
-            continue
+def backfill_fingerprints(assignment_id: str, known_urls: set) -> None:
+    """
+    Fingerprint submissions made before the index existed (one-time per file).
+    """
+    for url in known_urls - indexed_urls(assignment_id):
         try:
-            existing_text = extract_text_from_docx_url(url)
-            sim = similarity(new_text, existing_text)
-            if sim > max_sim:
-                max_sim = sim
+            add_fingerprint(assignment_id, url, extract_text_from_docx_url(url))
         except Exception:
             continue
 
-    return round(max_sim * 100, 2)
+def _excerpt(text, start, end):
+    passage = " ".join(text[start:end].split())
+    return passage if len(passage) <= EXCERPT_CHARS else passage[:EXCERPT_CHARS - 1] + "…"
+
+@timed("plagiarism")
+def plagiarism_report(assignment_id: str, new_file_url: str, new_text: str = None) -> dict:
+    """
+    Find the passages a new submission shares with other submissions of the same
+    assignment (Supabase). Returns {"percent": share of its words found elsewhere,
+    "matches": the longest shared passages, with character offsets into both texts}.
+    """
+    by_url = {
+        sub["file_url"]: sub
+        for sub in iter_submissions_for_assignment(assignment_id, columns=SOURCE_COLUMNS)
+        if sub.get("file_url")
+    }
+
+    if new_text is None:
+        new_text = extract_text_from_docx_url(new_file_url)
+    words, offsets = tokenize(new_text)
+    signature = minhash_signature(new_text)
+
+    matches, covered = [], []
+    if by_url and words:
+        backfill_fingerprints(assignment_id, set(by_url))
+
+        # LSH narrows the assignment to likely sources; winnowing verifies each one
+        candidates = query_candidates(assignment_id, signature, current_app.config["PLAGIARISM_MAX_CANDIDATES"])
+        prints = fingerprints(words)
+        for url, existing_text in candidates.items():
+            # ignore fingerprints whose submission never made it into Supabase
+            if url not in by_url or url == new_file_url:
+                continue
+            source = by_url[url]
+            source_words, source_offsets = tokenize(existing_text)
+            for a_start, a_end, b_start, b_end in match_spans(words, source_words, prints_a=prints):
+                covered.append((a_start, a_end))
+                start, end = offsets[a_start][0], offsets[a_end - 1][1]
+                matches.append({
+                    "submission_id": source.get("id"),
+                    "student_email": source.get("student_email"),
+                    "start": start,
+                    "end": end,
+                    "source_start": source_offsets[b_start][0],
+                    "source_end": source_offsets[b_end - 1][1],
+                    "words": a_end - a_start,
+                    "excerpt": _excerpt(new_text, start, end),
+                })
+
+    add_fingerprint(assignment_id, new_file_url, new_text, signature=signature)
+
+    percent = sum(end - start for start, end in merge_ranges(covered)) / len(words) if words else 0.0
+    matches.sort(key=lambda m: -m["words"])
+    return {
+        "percent": round(percent * 100, 2),
+        "matches": matches[:current_app.config["PLAGIARISM_MAX_MATCHES"]],
+    }
+
+def calculate_plagiarism_for_assignment(assignment_id: str, new_file_url: str, new_text: str = None) -> float:
+    """
+    Compare new submission with previous ones for the same assignment (Supabase).
+    """
+    return plagiarism_report(assignment_id, new_file_url, new_text)["percent"]
@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from .chunking import count_tokens, split_oversized
+
+# Paragraph-level cleanup between text extraction and the LLM prompt. Only
+# layout noise is removed; the student's own prose is kept verbatim.
+_SPACE_RE = re.compile("[ \t\u00a0\u2000-\u200a\u202f\u205f\u3000]+")
+_INVISIBLE_RE = re.compile("[\u200b-\u200d\u2060\ufeff\u00ad]")
+_SENTENCE_RE = re.compile(r"(.+?[.!?])(\s|$)")
+_OMITTED_MARKER = "[… {} paragraph(s) omitted to fit the evaluation budget …]"
+
+BOILERPLATE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"^page\s*\d+(\s*(of|/)\s*\d+)?$",  # "Page 3", "Page 3 of 10"
+        r"^[-\u2013\u2014]\s*\d+\s*[-\u2013\u2014]$",  # "- 3 -"
+        r"^[\W_]+$",  # separators: ----, ****, ____
+        r"^.{1,80}?(\.\s?){4,}\s*\d+$",  # table of contents entries with dot leaders
+        r"^(table of contents|contents)$",
+        r"^(confidential|draft|all rights reserved\.?)$",
+        r"^(click|tap) (here|to) .{0,60}$",
+    )
+]
+
+
+def normalize_paragraph(paragraph):
+    paragraph = unicodedata.normalize("NFC", _INVISIBLE_RE.sub("", paragraph))
+    return _SPACE_RE.sub(" ", paragraph).strip()
+
+
+def _is_boilerplate(paragraph):
+    return any(p.match(paragraph) for p in BOILERPLATE_PATTERNS)
+
+
+def clean_paragraphs(text):
+    """
+    Normalized, non-empty paragraphs with boilerplate and duplicates removed.
+    Returns (paragraphs, dropped) where dropped counts removed non-empty blocks.
+    """
+    kept, seen, dropped = [], set(), 0
+    for raw in (text or "").split("\n"):
+        paragraph = normalize_paragraph(raw)
+        if not paragraph:
+            continue
+        key = paragraph.casefold()
+        if _is_boilerplate(paragraph) or key in seen:
+            dropped += 1
+            continue
+        # later copies of a header, footer or pasted block are dropped; the first stays
+        seen.add(key)
+        kept.append(paragraph)
+    return kept, dropped
+
+
+def _first_sentence(paragraph):
+    m = _SENTENCE_RE.match(paragraph)
+    return m.group(1) if m else paragraph
+
+
+def _fit(paragraphs, budget, model):
+    """
+    Keep the opening and the conclusion: paragraphs from the start up to ~70%
+    of the budget, then from the end, with a marker where text was left out.
+    Returns (paragraphs, number omitted).
+
+    Paragraphs longer than a tenth of the budget are first cut into word-aligned
+    pieces, so a single huge paragraph still contributes its start and end.
+    """
+    piece_tokens = max(budget // 10, 1)
+    pieces = []
+    for p in paragraphs:
+        if count_tokens(p, model) > piece_tokens:
+            pieces.extend(split_oversized(p, piece_tokens, model))
+        else:
+            pieces.append(p)
+    paragraphs = pieces
+
+    # room for the marker itself, sized for the largest possible count
+    budget -= count_tokens(_OMITTED_MARKER.format(len(paragraphs)), model) + 1
+    costs = [count_tokens(p, model) + 1 for p in paragraphs]
+    head, used = [], 0
+    for p, cost in zip(paragraphs, costs):
+        if used + cost > budget * 0.7:
+            break
+        head.append(p)
+        used += cost
+
+    tail = []
+    for p, cost in zip(reversed(paragraphs[len(head):]), reversed(costs[len(head):])):
+        if used + cost > budget:
+            break
+        tail.insert(0, p)
+        used += cost
+
+    omitted = len(paragraphs) - len(head) - len(tail)
+    if omitted <= 0:
+        return paragraphs, 0
+    return head + [_OMITTED_MARKER.format(omitted)] + tail, omitted
+
+
+def prepare_text(text, budget, strategy="truncate", model="gpt-4.1-mini"):
+    """
+    Clean extracted text for the prompt and bring it within `budget` tokens
+    (0: no limit). strategy "truncate" keeps the opening and the end;
+    "summarize" first condenses every paragraph to its leading sentence.
+    Returns (text, stats) with token counts before and after.
+    """
+    tokens_before = count_tokens(text, model)
+    paragraphs, dropped = clean_paragraphs(text)
+    cleaned = "\n".join(paragraphs)
+    tokens = count_tokens(cleaned, model)
+
+    condensed = truncated = False
+    if budget and tokens > budget:
+        if strategy == "summarize":
+            paragraphs = [_first_sentence(p) for p in paragraphs]
+            condensed = True
+        fitted, omitted = _fit(paragraphs, budget, model)
+        truncated = omitted > 0
+        cleaned = "\n".join(fitted)
+        tokens = count_tokens(cleaned, model)
+
+    return cleaned, {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens,
+        "tokens_saved": max(tokens_before - tokens, 0),
+        "blocks_dropped": dropped,
+        "condensed": condensed,
+        "truncated": truncated,
+    }
@@ -1,9 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
 from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-import textwrap
+import base64
+from datetime import datetime, timezone
+import json
 import traceback
 
 
@@ -28,7 +28,26 @@ def dashboard():
         current_app.logger.exception("Failed to load assignments")
         assignments = {}
 
-    return render_template("professor_dashboard.html", assignments=assignments)
+    from .assignment_stats import get_stats
+    from .http_cache import content_version, not_modified, page_etag, render_fragment, with_etag
+
+    # maintained as submissions arrive, so this is one local lookup, not a scan
+    stats = get_stats(assignments)
+
+    assignments_version = content_version(assignments, stats)
+    etag = page_etag(assignments_version)
+    unchanged = not_modified(etag)
+    if unchanged is not None:
+        return unchanged
+
+    assignments_html = render_fragment(
+        "professor_assignments",
+        assignments_version,
+        "professor_assignments_fragment.html",
+        assignments=assignments,
+        stats=stats,
+    )
+    return with_etag(render_template("professor_dashboard.html", assignments_html=assignments_html), etag)
 
 
 
@@ -70,22 +89,101 @@ def create_assignment_route():
 
 # View Submissions
 
+def _encode_cursor(after):
+    return base64.urlsafe_b64encode(json.dumps(after, default=str).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    # a hand-edited cursor starts from the first page rather than failing the query
+    if not isinstance(after, dict) or set(after) != {"value", "id"}:
+        return None
+    return after
+
+
 @professor_bp.route("/submissions/<assignment_id>")
 @login_required
 def view_submissions(assignment_id):
     if current_user.role != "professor":
         return redirect(url_for("student.dashboard"))
 
+    from .concurrency import in_parallel
+    from .supabase_service import LISTING_SORTS, list_submissions_page, get_assignment
+
+    sort = request.args.get("sort", "created_at")
+    if sort not in LISTING_SORTS:
+        sort = "created_at"
+    order = "desc" if request.args.get("order") == "desc" else "asc"
+    cursor = request.args.get("cursor")
+    after = _decode_cursor(cursor) if cursor else None
+    page_size = current_app.config["SUBMISSIONS_PAGE_SIZE"]
+
+    next_cursor = None
     try:
-        from .supabase_service import get_submissions_for_assignment, get_assignment
-        submissions = get_submissions_for_assignment(assignment_id) or {}
-        assignment = get_assignment(assignment_id) or {}
-    except Exception as e:
+        (submissions, next_after), assignment = in_parallel(
+            lambda: list_submissions_page(
+                assignment_id, sort=sort, descending=order == "desc", after=after, limit=page_size
+            ),
+            lambda: get_assignment(assignment_id),
+        )
+        if next_after:
+            next_cursor = _encode_cursor(next_after)
+        assignment = assignment or {}
+    except Exception:
         current_app.logger.exception("Could not load submissions")
-        submissions = {}
+        submissions = []
         assignment = {}
 
-    return render_template("view_submissions.html", submissions=submissions, assignment=assignment)
+    return render_template(
+        "view_submissions.html",
+        submissions=submissions,
+        assignment=assignment,
+        assignment_id=assignment_id,
+        sort=sort,
+        order=order,
+        sorts=LISTING_SORTS,
+        next_cursor=next_cursor,
+        is_first_page=cursor is None,
+    )
+
+
+
+# View Single Submission (full feedback)
+
+@professor_bp.route("/submissions/<assignment_id>/<submission_id>")
+@login_required
+def view_submission(assignment_id, submission_id):
+    if current_user.role != "professor":
+        return redirect(url_for("student.dashboard"))
+
+    from .concurrency import in_parallel
+    from .supabase_service import get_submission, get_assignment
+
+    submission, assignment = in_parallel(
+        lambda: get_submission(submission_id),
+        lambda: get_assignment(assignment_id),
+    )
+    if not submission or str(submission.get("assignment_id")) != str(assignment_id):
+        flash("Submission not found.", "warning")
+        return redirect(url_for("professor.view_submissions", assignment_id=assignment_id))
+
+    assignment = assignment or {}
+
+    # full text with the matched passages highlighted, when the index has it
+    segments = None
+    matches = submission.get("plagiarism_matches") or []
+    if matches and submission.get("file_url"):
+        from .fingerprint_index import get_text
+        from .winnowing import highlight_segments
+
+        text = get_text(submission["file_url"])
+        if text:
+            segments = highlight_segments(text, [(m["start"], m["end"]) for m in matches])
+
+    return render_template("submission_detail.html", submission=submission, assignment=assignment, segments=segments)
 
 
 
@@ -99,97 +197,119 @@ def download_pdf_report(assignment_id, submission_id):
         return "Forbidden", 403
 
     try:
-        from .supabase_service import get_submissions_for_assignment, get_assignment
+        from .concurrency import in_parallel
+        from .supabase_service import get_submission, get_assignment
+        from .reports import PROFESSOR, report_pending_response, request_report_pdf
 
-        subs = get_submissions_for_assignment(assignment_id) or {}
+        submission, assignment = in_parallel(
+            lambda: get_submission(submission_id),
+            lambda: get_assignment(assignment_id),
+        )
 
-        # Support dict or list structures
-        submission = None
-        if isinstance(subs, dict):
-            submission = subs.get(submission_id)
-        elif isinstance(subs, list):
-            for row in subs:
-                if str(row.get("id")) == str(submission_id):
-                    submission = row
-                    break
-
-        if not submission:
+        if not submission or str(submission.get("assignment_id")) != str(assignment_id):
             flash("Submission not found.", "warning")
             return redirect(url_for("professor.view_submissions", assignment_id=assignment_id))
 
-        assignment = get_assignment(assignment_id) or {}
-
-        # Build PDF
-        buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        left = 50
-        top = height - 50
-
-        # Header
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(left, top, f"Report — {assignment.get('title', 'Assignment')}")
-        c.setFont("Helvetica", 10)
-        c.drawString(width - 220, top, f"Assignment ID: {assignment_id}")
-
-        # Metadata
-        y = top - 36
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(left, y, "Submission Details:")
-        y -= 18
-        c.setFont("Helvetica", 11)
-        c.drawString(left, y, f"Student: {submission.get('student_email', '—')}")
-        y -= 16
-        c.drawString(left, y, f"Submission ID: {submission.get('id', submission_id)}")
-        y -= 16
-        c.drawString(left, y, f"Score: {submission.get('score', '—')}")
-        y -= 16
-        c.drawString(left, y, f"Plagiarism: {submission.get('plagiarism_percent', 0)}%")
-        y -= 22
-
-        # Feedback
-        c.setFont("Helvetica-Bold", 13)
-        c.drawString(left, y, "Feedback:")
-        y -= 18
-        c.setFont("Helvetica", 11)
-        feedback = submission.get("feedback", "") or ""
-        for paragraph in feedback.splitlines() or [""]:
-            for line in textwrap.wrap(paragraph, width=90) or [""]:
-                if y < 60:
-                    c.showPage()
-                    y = height - 50
-                    c.setFont("Helvetica", 11)
-                c.drawString(left, y, line)
-                y -= 14
-
-        # AI summary if exists
-        if submission.get("ai_summary"):
-            if y < 120:
-                c.showPage()
-                y = height - 50
-            y -= 8
-            c.setFont("Helvetica-Bold", 13)
-            c.drawString(left, y, "AI Summary:")
-            y -= 18
-            c.setFont("Helvetica", 11)
-            for paragraph in str(submission.get("ai_summary")).splitlines():
-                for line in textwrap.wrap(paragraph, width=90):
-                    if y < 60:
-                        c.showPage()
-                        y = height - 50
-                        c.setFont("Helvetica", 11)
-                    c.drawString(left, y, line)
-                    y -= 14
-
-        c.showPage()
-        c.save()
-        buffer.seek(0)
+        pdf = request_report_pdf(assignment or {}, submission, PROFESSOR)
+        if pdf is None:
+            return report_pending_response()
 
         filename = f"prof_report_{submission_id}.pdf"
-        return send_file(buffer, as_attachment=True, download_name=filename, mimetype="application/pdf")
+        return send_file(BytesIO(pdf), as_attachment=True, download_name=filename, mimetype="application/pdf")
 
     except Exception as exc:
         current_app.logger.exception("Error generating professor PDF report")
         traceback.print_exc()
         flash("Could not generate PDF report. Check server logs.", "danger")
         return redirect(url_for("professor.view_submissions", assignment_id=assignment_id))
+
+
+
+# Download All Reports (streamed ZIP)
+
+@professor_bp.route("/reports/<assignment_id>/zip")
+@login_required
+def download_reports_zip(assignment_id):
+    if current_user.role != "professor":
+        return "Forbidden", 403
+
+    from .supabase_service import get_assignment, iter_submissions_for_assignment
+    from .reports import iter_reports_zip
+
+    assignment = get_assignment(assignment_id)
+    if not assignment:
+        flash("Assignment not found.", "warning")
+        return redirect(url_for("professor.dashboard"))
+
+    submissions = iter_submissions_for_assignment(assignment_id)
+    filename = f"reports_{assignment_id}.zip"
+    return Response(
+        stream_with_context(iter_reports_zip(assignment, submissions)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+
+# Gradebook Export (streamed CSV / JSONL)
+
+@professor_bp.route("/export", defaults={"assignment_id": None})
+@professor_bp.route("/export/<assignment_id>")
+@login_required
+def export_grades(assignment_id):
+    if current_user.role != "professor":
+        return "Forbidden", 403
+
+    from .supabase_service import iter_submissions
+    from .exports import FORMATS, GRADEBOOK_COLUMNS, iter_export
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return f"Unsupported format: {fmt}", 400
+    mimetype, extension = FORMATS[fmt]
+
+    rows = iter_submissions(assignment_id, columns=GRADEBOOK_COLUMNS)
+    filename = f"grades_{assignment_id}.{extension}" if assignment_id else f"gradebook.{extension}"
+    return Response(
+        stream_with_context(iter_export(rows, fmt)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+
+# Collusion Report (all-pairs similarity clusters)
+
+@professor_bp.route("/collusion/<assignment_id>", methods=["GET", "POST"])
+@login_required
+def collusion_report(assignment_id):
+    if current_user.role != "professor":
+        return redirect(url_for("student.dashboard"))
+
+    from .collusion import get_stored_report, refresh_report
+    from .supabase_service import get_assignment
+
+    assignment = get_assignment(assignment_id) or {}
+    report = None
+    try:
+        if request.method == "POST":
+            threshold = request.form.get("threshold", type=float)
+            report = refresh_report(assignment_id, threshold / 100 if threshold else None)
+            flash("Collusion report rebuilt.", "success")
+        else:
+            report = get_stored_report(assignment_id) or refresh_report(assignment_id)
+    except Exception:
+        current_app.logger.exception("Could not build collusion report")
+        flash("Could not build collusion report.", "danger")
+
+    generated_at = None
+    if report:
+        generated_at = datetime.fromtimestamp(report["generated_at"], timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+    return render_template(
+        "collusion_report.html",
+        assignment=assignment,
+        assignment_id=assignment_id,
+        report=report,
+        generated_at=generated_at,
+    )
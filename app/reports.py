@@ -0,0 +1,339 @@
+import hashlib
+import json
+import pickle
+import textwrap
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from io import BytesIO
+from flask import current_app, make_response, render_template
+from .cache import cache_key, get_cache_backend
+
+# Bump when the layout changes so cached PDFs are re-rendered.
+RENDERER_VERSION = 2
+
+STUDENT, PROFESSOR = "student", "professor"
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+_rendering = set()  # (cache key, version) renders queued or running in this process
+
+# Seconds the "report is being prepared" page waits before retrying.
+PENDING_RETRY_AFTER = 2
+
+_MISS = object()
+
+
+class ReportRenderError(RuntimeError):
+    pass
+
+
+# ---------------- RENDERING ---------------- #
+
+def _draw_wrapped(c, text, left, y, height, font=("Helvetica", 11)):
+    for paragraph in str(text).splitlines() or [""]:
+        for line in textwrap.wrap(paragraph, width=90) or [""]:
+            if y < 60:
+                c.showPage()
+                y = height - 50
+                c.setFont(*font)
+            c.drawString(left, y, line)
+            y -= 14
+    return y
+
+
+def _draw_matches(c, matches, variant, left, y, height):
+    """
+    Matched passages on a highlighter background; only professors see whose
+    submission each passage matches.
+    """
+    c.setFont("Helvetica-Bold", 13)
+    c.drawString(left, y, "Matched Passages:")
+    y -= 18
+    for match in matches:
+        if y < 90:
+            c.showPage()
+            y = height - 50
+        c.setFont("Helvetica-Oblique", 10)
+        source = f" — matches {match.get('student_email')}" if variant == PROFESSOR else ""
+        c.drawString(left, y, f"{match.get('words')} words{source}")
+        y -= 14
+        c.setFont("Helvetica", 11)
+        for line in textwrap.wrap(match.get("excerpt", ""), width=90) or [""]:
+            if y < 60:
+                c.showPage()
+                y = height - 50
+                c.setFont("Helvetica", 11)
+            c.setFillColorRGB(1, 0.93, 0.4)
+            c.rect(left - 2, y - 3, c.stringWidth(line, "Helvetica", 11) + 4, 13, stroke=0, fill=1)
+            c.setFillColorRGB(0, 0, 0)
+            c.drawString(left, y, line)
+            y -= 14
+        y -= 6
+    return y
+
+
+def render_report_pdf(assignment, submission, variant):
+    """
+    Draw a submission report. The professor variant adds ids and the AI summary.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    left = 50
+    top = height - 50
+
+    # Header
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(left, top, f"Report — {assignment.get('title', 'Assignment')}")
+
+    if variant == PROFESSOR:
+        c.setFont("Helvetica", 10)
+        c.drawString(width - 220, top, f"Assignment ID: {submission.get('assignment_id', '—')}")
+
+        y = top - 36
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(left, y, "Submission Details:")
+        y -= 18
+        c.setFont("Helvetica", 11)
+        c.drawString(left, y, f"Student: {submission.get('student_email', '—')}")
+        y -= 16
+        c.drawString(left, y, f"Submission ID: {submission.get('id', '—')}")
+        y -= 16
+        c.drawString(left, y, f"Score: {submission.get('score', '—')}")
+        y -= 16
+        c.drawString(left, y, f"Plagiarism: {submission.get('plagiarism_percent', 0)}%")
+        y -= 22
+    else:
+        c.setFont("Helvetica", 12)
+        y = top - 30
+        c.drawString(left, y, f"Student: {submission.get('student_email')}")
+        y -= 18
+        c.drawString(left, y, f"Score: {submission.get('score', '—')}")
+        y -= 18
+        c.drawString(left, y, f"Plagiarism: {submission.get('plagiarism_percent', 0)}%")
+        y -= 24
+
+    # Feedback
+    c.setFont("Helvetica-Bold", 13)
+    c.drawString(left, y, "Feedback:")
+    y -= 18
+    c.setFont("Helvetica", 11)
+    y = _draw_wrapped(c, submission.get("feedback", "") or "", left, y, height)
+
+    if submission.get("plagiarism_matches"):
+        if y < 120:
+            c.showPage()
+            y = height - 50
+        y -= 8
+        y = _draw_matches(c, submission["plagiarism_matches"], variant, left, y, height)
+
+    # AI summary if exists
+    if variant == PROFESSOR and submission.get("ai_summary"):
+        if y < 120:
+            c.showPage()
+            y = height - 50
+        y -= 8
+        c.setFont("Helvetica-Bold", 13)
+        c.drawString(left, y, "AI Summary:")
+        y -= 18
+        c.setFont("Helvetica", 11)
+        _draw_wrapped(c, submission.get("ai_summary"), left, y, height)
+
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+# ---------------- CACHE ---------------- #
+
+def content_version(assignment, submission, variant):
+    fields = {
+        "renderer": RENDERER_VERSION,
+        "variant": variant,
+        "title": assignment.get("title"),
+        "submission": {
+            k: submission.get(k)
+            for k in (
+                "id", "assignment_id", "student_email", "score", "plagiarism_percent", "plagiarism_matches",
+                "feedback", "ai_summary",
+            )
+        },
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def invalidate_reports(submission_id):
+    backend = get_cache_backend()
+    for variant in (STUDENT, PROFESSOR):
+        backend.delete(cache_key("report", variant, submission_id))
+
+
+def _get_render_pool():
+    global _render_pool
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = ThreadPoolExecutor(
+                    max_workers=current_app.config["REPORT_RENDER_WORKERS"], thread_name_prefix="report"
+                )
+    return _render_pool
+
+
+def _cached_pdf(key, version):
+    """
+    The cached PDF for this content version, None while a failed render of it
+    is remembered (REPORT_FAILURE_TTL), or _MISS.
+    """
+    blob = get_cache_backend().get(key)
+    if blob is not None:
+        cached_version, pdf = pickle.loads(blob)
+        if cached_version == version:
+            return pdf
+    return _MISS
+
+
+def get_report_pdf(assignment, submission, variant):
+    """
+    Cached PDF bytes for a submission, rendered in the calling thread on a miss.
+    Entries are keyed by submission id and carry a content version, so a changed
+    submission is never served stale. For the grading worker and the render
+    pool; request handlers use request_report_pdf.
+    """
+    ttl = current_app.config["CACHE_TTLS"].get("report", 0)
+    key = cache_key("report", variant, submission.get("id"))
+    version = content_version(assignment, submission, variant)
+
+    pdf = _cached_pdf(key, version) if ttl else _MISS
+    if pdf is _MISS or pdf is None:
+        pdf = render_report_pdf(assignment, submission, variant)
+        if ttl:
+            get_cache_backend().set(key, pickle.dumps((version, pdf)), ttl)
+    return pdf
+
+
+def _render_in_background(app, assignment, submission, variant, pending):
+    try:
+        with app.app_context():
+            try:
+                get_report_pdf(assignment, submission, variant)
+            except Exception:
+                app.logger.exception("Could not render %s report for submission %s", variant, submission.get("id"))
+                # remembered briefly, so polling requests stop queueing the same render
+                key, version = pending
+                get_cache_backend().set(key, pickle.dumps((version, None)), app.config["REPORT_FAILURE_TTL"])
+    finally:
+        with _render_pool_lock:
+            _rendering.discard(pending)
+
+
+def request_report_pdf(assignment, submission, variant):
+    """
+    The cached PDF, or None after queueing its render on the bounded render pool,
+    so a request never draws a PDF itself. Raises ReportRenderError when the last
+    render of this version failed within REPORT_FAILURE_TTL. The grading worker
+    pre-renders every report, so misses follow regrades and cache evictions.
+    """
+    if not current_app.config["CACHE_TTLS"].get("report", 0):
+        # nowhere to leave a background render; draw it here
+        return render_report_pdf(assignment, submission, variant)
+
+    key = cache_key("report", variant, submission.get("id"))
+    version = content_version(assignment, submission, variant)
+    pdf = _cached_pdf(key, version)
+    if pdf is None:
+        raise ReportRenderError(f"Rendering the {variant} report for submission {submission.get('id')} failed")
+    if pdf is not _MISS:
+        return pdf
+
+    pending = (key, version)
+    with _render_pool_lock:
+        queued = pending in _rendering
+        _rendering.add(pending)
+    if not queued:
+        _get_render_pool().submit(
+            _render_in_background, current_app._get_current_object(), assignment, submission, variant, pending
+        )
+    return None
+
+
+def report_pending_response():
+    """
+    202 page that reloads itself until the report is ready.
+    """
+    response = make_response(render_template("report_pending.html", retry_after=PENDING_RETRY_AFTER), 202)
+    response.headers["Retry-After"] = str(PENDING_RETRY_AFTER)
+    response.headers["Refresh"] = str(PENDING_RETRY_AFTER)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def warm_reports(assignment, submission):
+    for variant in (STUDENT, PROFESSOR):
+        get_report_pdf(assignment, submission, variant)
+
+
+# ---------------- BULK EXPORT ---------------- #
+
+class _ChunkSink:
+    """Write-only file object for zipfile; the stream drains it between entries."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _render_entry(app, assignment, submission, variant):
+    with app.app_context():
+        return submission, get_report_pdf(assignment, submission, variant)
+
+
+def iter_reports_zip(assignment, submissions, variant=PROFESSOR):
+    """
+    Yield a ZIP of every submission's report, one entry at a time. Cached reports
+    are written straight away; missing ones render on the report pool, a few at
+    a time so memory stays flat, and are written as they finish.
+    """
+    app = current_app._get_current_object()
+    cached = bool(current_app.config["CACHE_TTLS"].get("report", 0))
+    window = current_app.config["REPORT_RENDER_WORKERS"] * 2
+    pool = _get_render_pool()
+
+    sink = _ChunkSink()
+    in_flight = set()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        def write(submission, pdf):
+            email = (submission.get("student_email") or "student").replace("@", "_at_")
+            zf.writestr(f"{email}_{submission.get('id')}.pdf", pdf)
+            return sink.drain()
+
+        for submission in submissions:
+            if cached:
+                key = cache_key("report", variant, submission.get("id"))
+                pdf = _cached_pdf(key, content_version(assignment, submission, variant))
+                if isinstance(pdf, bytes):
+                    yield write(submission, pdf)
+                    continue
+            in_flight.add(pool.submit(_render_entry, app, assignment, submission, variant))
+            if len(in_flight) >= window:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield write(*future.result())
+
+        for future in as_completed(in_flight):
+            yield write(*future.result())
+    yield sink.drain()
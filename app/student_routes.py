@@ -1,12 +1,9 @@
 # app/student_routes.py
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify
 from flask_login import login_required, current_user
 import os
 from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-import textwrap
 
 
 # MUST BE DEFINED FIRST!!!
@@ -32,21 +29,31 @@ def dashboard():
     if current_user.role != "student":
         return redirect(url_for("professor.dashboard"))
 
-    from .supabase_service import get_all_assignments, get_submissions_for_assignment
+    from .concurrency import in_parallel
+    from .supabase_service import get_all_assignments, get_submissions_for_student
 
-    assignments = get_all_assignments()
-    my_submissions = []
+    from .http_cache import content_version, not_modified, page_etag, render_fragment, with_etag
 
-    for aid, a in assignments.items():
-        subs = get_submissions_for_assignment(aid)
+    email = current_user.email
+    assignments, my_submissions = in_parallel(
+        get_all_assignments,
+        lambda: get_submissions_for_student(email),
+    )
 
-        for sid, s in subs.items():
-            if s.get("student_email") == current_user.email:
-                s["submission_id"] = sid
-                s["assignment"] = {"id": aid, "title": a["title"]}
-                my_submissions.append(s)
+    # refreshes while waiting for a grade get a 304 until a row changes
+    assignments_version = content_version(assignments)
+    etag = page_etag(assignments_version, my_submissions)
+    unchanged = not_modified(etag)
+    if unchanged is not None:
+        return unchanged
 
-    return render_template("student_dashboard.html", assignments=assignments, my_submissions=my_submissions)
+    assignments_html = render_fragment(
+        "student_assignments", assignments_version, "student_assignments_fragment.html", assignments=assignments
+    )
+    return with_etag(
+        render_template("student_dashboard.html", assignments_html=assignments_html, my_submissions=my_submissions),
+        etag,
+    )
 
 
 
@@ -70,29 +77,12 @@ def submit_assignment(assignment_id):
             return redirect(request.url)
 
         try:
-            from .cloudinary_service import upload_docx_to_cloudinary
-            from .evaluation import evaluate_assignment_from_url
-            from .plagiarism import calculate_plagiarism_for_assignment
-            from .supabase_service import add_submission
-
-            file_url = upload_docx_to_cloudinary(file)
-
-            score, feedback = evaluate_assignment_from_url(file_url)
-            plagiarism = calculate_plagiarism_for_assignment(assignment_id, file_url)
-
-            submission_id = add_submission(
-                assignment_id,
-                current_user.email,
-                file_url,
-                score,
-                plagiarism,
-                feedback,
-            )
-
-            flash("Submitted successfully!", "success")
-            return redirect(
-                url_for("student.view_result", assignment_id=assignment_id, submission_id=submission_id)
-            )
+            from .grading_queue import enqueue_grading_job
+
+            job_id = enqueue_grading_job(assignment_id, current_user.email, file)
+
+            flash("Submission received! Grading in progress.", "success")
+            return redirect(url_for("student.grading_job", job_id=job_id))
 
         except Exception as e:
             print("Submit error:", e)
@@ -102,26 +92,86 @@ def submit_assignment(assignment_id):
 
 
 
+# Grading Job Status
+
+def _job_payload(job):
+    payload = {"job_id": job["id"], "status": job["status"], "attempts": job["attempts"]}
+    if job["status"] == "done":
+        payload["result_url"] = url_for(
+            "student.view_result", assignment_id=job["assignment_id"], submission_id=job["submission_id"]
+        )
+    elif job["status"] == "failed":
+        payload["error"] = "Grading failed. Please try submitting again."
+    return payload
+
+
+@student_bp.route("/job/<job_id>")
+@login_required
+def grading_job(job_id):
+    from .grading_queue import get_job
+
+    job = get_job(job_id)
+    if not job or job["student_email"] != current_user.email:
+        flash("Submission not found.", "warning")
+        return redirect(url_for("student.dashboard"))
+
+    payload = _job_payload(job)
+    if payload.get("result_url"):
+        return redirect(payload["result_url"])
+
+    return render_template("grading_status.html", job=payload)
+
+
+@student_bp.route("/job/<job_id>/status")
+@login_required
+def grading_job_status(job_id):
+    from .grading_queue import get_job
+
+    job = get_job(job_id)
+    if not job or job["student_email"] != current_user.email:
+        return jsonify({"error": "not found"}), 404
+
+    return jsonify(_job_payload(job))
+
+
+
 # View Result
 
 @student_bp.route("/result/<assignment_id>/<submission_id>")
 @login_required
 def view_result(assignment_id, submission_id):
-    from .supabase_service import get_submissions_for_assignment, get_assignment
+    from .concurrency import in_parallel
+    from .supabase_service import get_submission, get_assignment
 
-    subs = get_submissions_for_assignment(assignment_id)
-    submission = subs.get(submission_id)
-    assignment = get_assignment(assignment_id)
+    # one row instead of the whole assignment's submissions, fetched alongside the assignment
+    submission, assignment = in_parallel(
+        lambda: get_submission(submission_id),
+        lambda: get_assignment(assignment_id),
+    )
 
-    if not submission:
+    if (
+        not submission
+        or str(submission.get("assignment_id")) != str(assignment_id)
+        or submission.get("student_email") != current_user.email
+    ):
         flash("Result not found", "warning")
         return redirect(url_for("student.dashboard"))
 
-    return render_template(
-        "student_result.html",
-        submission=submission,
-        assignment=assignment,
-        submission_id=submission_id,
+    from .http_cache import not_modified, page_etag, with_etag
+
+    etag = page_etag(submission, assignment)
+    unchanged = not_modified(etag)
+    if unchanged is not None:
+        return unchanged
+
+    return with_etag(
+        render_template(
+            "student_result.html",
+            submission=submission,
+            assignment=assignment,
+            submission_id=submission_id,
+        ),
+        etag,
     )
 
 
@@ -136,21 +186,16 @@ def download_my_report(assignment_id, submission_id):
         return "Forbidden", 403
 
     try:
-        from .supabase_service import get_submissions_for_assignment, get_assignment
-
-        subs = get_submissions_for_assignment(assignment_id) or {}
+        from .concurrency import in_parallel
+        from .supabase_service import get_submission, get_assignment
+        from .reports import STUDENT, report_pending_response, request_report_pdf
 
-        # Find submission
-        submission = None
-        if isinstance(subs, dict):
-            submission = subs.get(submission_id)
-        elif isinstance(subs, list):
-            for row in subs:
-                if str(row.get("id")) == str(submission_id):
-                    submission = row
-                    break
+        submission, assignment = in_parallel(
+            lambda: get_submission(submission_id),
+            lambda: get_assignment(assignment_id),
+        )
 
-        if not submission:
+        if not submission or str(submission.get("assignment_id")) != str(assignment_id):
             flash("Submission not found.", "warning")
             return redirect(url_for("student.dashboard"))
 
@@ -158,48 +203,12 @@ def download_my_report(assignment_id, submission_id):
         if submission.get("student_email") != current_user.email:
             return "Forbidden", 403
 
-        assignment = get_assignment(assignment_id) or {}
-
-        # Build PDF
-        buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=A4)
-
-        width, height = A4
-        left = 50
-        top = height - 50
-
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(left, top, f"Report — {assignment.get('title','Assignment')}")
-
-        c.setFont("Helvetica", 12)
-        y = top - 30
-        c.drawString(left, y, f"Student: {submission.get('student_email')}")
-        y -= 18
-        c.drawString(left, y, f"Score: {submission.get('score','—')}")
-        y -= 18
-        c.drawString(left, y, f"Plagiarism: {submission.get('plagiarism_percent',0)}%")
-        y -= 24
-
-        c.setFont("Helvetica-Bold", 13)
-        c.drawString(left, y, "Feedback:")
-        y -= 18
-        c.setFont("Helvetica", 11)
-
-        feedback = submission.get("feedback", "") or ""
-        for paragraph in feedback.splitlines():
-            for line in textwrap.wrap(paragraph, 90):
-                if y < 60:
-                    c.showPage()
-                    y = height - 50
-                c.drawString(left, y, line)
-                y -= 14
-
-        c.showPage()
-        c.save()
-        buffer.seek(0)
+        pdf = request_report_pdf(assignment or {}, submission, STUDENT)
+        if pdf is None:
+            return report_pending_response()
 
         return send_file(
-            buffer,
+            BytesIO(pdf),
             as_attachment=True,
             download_name=f"report_{submission_id}.pdf",
             mimetype="application/pdf",
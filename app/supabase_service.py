@@ -1,21 +1,111 @@
-from supabase import create_client
+import os
+import threading
 from flask import current_app
+from .cache import cached, invalidate
+from .metrics import increment, timed
+from .reports import invalidate_reports
 
 
-def get_supabase():
+# ---------------- CLIENT POOL ---------------- #
+# One client per worker process, shared by all threads. The underlying httpx
+# client keeps TLS connections alive between calls.
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"clients_created": 0, "connections_opened": 0, "requests": 0}
+
+
+def _bump(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+    increment("grader_supabase_client_events_total", event=counter)
+
+
+def _trace(event_name, info):
+    if event_name == "connection.connect_tcp.complete":
+        _bump("connections_opened")
+
+
+def _on_request(request):
+    _bump("requests")
+    request.extensions["trace"] = _trace
+
+
+def _build_http_client():
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=current_app.config["SUPABASE_MAX_CONNECTIONS"],
+        max_keepalive_connections=current_app.config["SUPABASE_MAX_KEEPALIVE"],
+        keepalive_expiry=current_app.config["SUPABASE_KEEPALIVE_EXPIRY"],
+    )
+    return httpx.Client(
+        limits=limits,
+        timeout=current_app.config["SUPABASE_TIMEOUT"],
+        event_hooks={"request": [_on_request]},
+    )
+
+
+def _create_pooled_client():
+    from supabase import create_client, ClientOptions
+
     url = current_app.config["SUPABASE_URL"]
     key = current_app.config["SUPABASE_KEY"]
-    return create_client(url, key)
+    http_client = _build_http_client()
+    try:
+        client = create_client(url, key, options=ClientOptions(httpx_client=http_client))
+    except TypeError:
+        # older supabase-py without httpx_client: hook the postgrest session instead
+        http_client.close()
+        client = create_client(url, key)
+        client.postgrest.session.event_hooks = {"request": [_on_request], "response": []}
+    _bump("clients_created")
+    return client
+
+
+def _create_local_client():
+    from .local_backends import LocalSupabaseClient
+
+    path = current_app.config["LOCAL_STORE_PATH"]
+    if not os.path.isabs(path):
+        path = os.path.join(current_app.instance_path, path)
+    return LocalSupabaseClient(path)
+
+
+def get_supabase():
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            # a forked worker must not reuse its parent's sockets
+            if _client is None or _client_pid != pid:
+                if current_app.config["DATA_BACKEND"] == "local":
+                    _client = _create_local_client()
+                else:
+                    _client = _create_pooled_client()
+                _client_pid = pid
+    return _client
+
+
+def get_supabase_stats():
+    with _stats_lock:
+        return dict(_stats)
 
 
 # ---------------- ASSIGNMENTS ---------------- #
 
+@timed("supabase.create_assignment")
 def create_assignment(title, description, due_date):
     supabase = get_supabase()
     data = {"title": title, "description": description, "due_date": due_date}
     supabase.table("assignments").insert(data).execute()
+    invalidate("assignments")
 
 
+@cached("assignments")
+@timed("supabase.get_all_assignments")
 def get_all_assignments():
     supabase = get_supabase()
     res = supabase.table("assignments").select("*").order("created_at").execute()
@@ -24,6 +114,8 @@ def get_all_assignments():
     return assignments
 
 
+@cached("assignment")
+@timed("supabase.get_assignment")
 def get_assignment(assignment_id):
     supabase = get_supabase()
     res = supabase.table("assignments").select("*").eq("id", assignment_id).execute()
@@ -33,7 +125,8 @@ def get_assignment(assignment_id):
 
 # ---------------- SUBMISSIONS ---------------- #
 
-def add_submission(assignment_id, student_email, file_url, score, plagiarism, feedback):
+@timed("supabase.add_submission")
+def add_submission(assignment_id, student_email, file_url, score, plagiarism, feedback, plagiarism_matches=None):
     supabase = get_supabase()
 
     data = {
@@ -44,13 +137,30 @@ def add_submission(assignment_id, student_email, file_url, score, plagiarism, fe
         "plagiarism_percent": plagiarism,
         "feedback": feedback,
     }
+    if plagiarism_matches is not None:
+        data["plagiarism_matches"] = plagiarism_matches
+        data["plagiarism_match_count"] = len(plagiarism_matches)
 
     res = supabase.table("submissions").insert(data).execute()
+    invalidate("submissions", assignment_id)
+    invalidate("student_submissions", student_email)
+    # the stored collusion report no longer covers every submission
+    invalidate("collusion", assignment_id)
 
-    rows = res.data or []
-    return rows[0]["id"]
+    submission_id = (res.data or [])[0]["id"]
+
+    # the row is already stored; a failure here must not make the caller retry the insert
+    try:
+        from .assignment_stats import record_submission
+        record_submission(assignment_id, submission_id, score, plagiarism)
+    except Exception:
+        current_app.logger.exception("Could not update stats for assignment %s", assignment_id)
+
+    return submission_id
 
 
+@cached("submissions")
+@timed("supabase.get_submissions_for_assignment")
 def get_submissions_for_assignment(assignment_id):
     supabase = get_supabase()
 
@@ -65,3 +175,147 @@ def get_submissions_for_assignment(assignment_id):
     rows = res.data or []
     submissions = {row["id"]: row for row in rows}
     return submissions
+
+
+@cached("submission")
+@timed("supabase.get_submission")
+def get_submission(submission_id):
+    supabase = get_supabase()
+    res = supabase.table("submissions").select("*").eq("id", submission_id).execute()
+    rows = res.data or []
+    return rows[0] if rows else None
+
+
+@cached("student_submissions")
+@timed("supabase.get_submissions_for_student")
+def get_submissions_for_student(student_email):
+    """
+    One student's submissions with their assignment titles, in a single round trip.
+    Relies on the submissions.assignment_id -> assignments.id foreign key and the
+    student_email index (supabase/migrations).
+    """
+    supabase = get_supabase()
+
+    res = (
+        supabase.table("submissions")
+        .select("id, assignment_id, score, plagiarism_percent, feedback, created_at, assignments(id, title)")
+        .eq("student_email", student_email)
+        .order("created_at")
+        .execute()
+    )
+
+    submissions = []
+    for row in res.data or []:
+        assignment = row.pop("assignments", None) or {}
+        row["submission_id"] = row["id"]
+        row["assignment"] = {"id": row["assignment_id"], "title": assignment.get("title")}
+        submissions.append(row)
+    return submissions
+
+
+def iter_submissions(assignment_id=None, columns="*", page_size=500):
+    """
+    Stream submissions page by page with keyset pagination on (created_at, id),
+    bypassing the cache; memory stays at one page however many rows there are.
+    `columns` must include created_at and id. All assignments when assignment_id is None.
+    """
+    supabase = get_supabase()
+    last = None
+
+    while True:
+        query = supabase.table("submissions").select(columns)
+        if assignment_id is not None:
+            query = query.eq("assignment_id", assignment_id)
+        if last is not None:
+            query = query.or_(
+                f'created_at.gt."{last["created_at"]}",'
+                f'and(created_at.eq."{last["created_at"]}",id.gt."{last["id"]}")'
+            )
+        with timed("supabase.iter_submissions"):
+            res = query.order("created_at").order("id").limit(page_size).execute()
+
+        rows = res.data or []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+
+
+def iter_submissions_for_assignment(assignment_id, columns="*", page_size=500):
+    return iter_submissions(assignment_id, columns=columns, page_size=page_size)
+
+
+# Columns the professor's submissions table shows; feedback loads per submission.
+LISTING_COLUMNS = (
+    "id, assignment_id, student_email, score, plagiarism_percent, plagiarism_match_count, file_url, created_at"
+)
+LISTING_SORTS = ("created_at", "score", "plagiarism_percent", "student_email")
+
+
+def _quote(value):
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+@timed("supabase.list_submissions_page")
+def list_submissions_page(assignment_id, sort="created_at", descending=False, after=None, limit=25):
+    """
+    One page of an assignment's submissions with only the listing columns.
+    Keyset pagination on (sort column, id), NULL sort values last.
+    `after` is {"value": ..., "id": ...} from the previous page's last row.
+    Returns (rows, next_after) where next_after is None on the last page.
+    """
+    if sort not in LISTING_SORTS:
+        raise ValueError(f"Unsupported sort column: {sort}")
+
+    supabase = get_supabase()
+    query = supabase.table("submissions").select(LISTING_COLUMNS).eq("assignment_id", assignment_id)
+
+    if after is not None:
+        op = "lt" if descending else "gt"
+        last_id = _quote(after["id"])
+        if after["value"] is None:
+            query = query.or_(f"and({sort}.is.null,id.{op}.{last_id})")
+        else:
+            value = _quote(after["value"])
+            query = query.or_(
+                f"{sort}.{op}.{value},and({sort}.eq.{value},id.{op}.{last_id}),{sort}.is.null"
+            )
+
+    res = (
+        query.order(sort, desc=descending, nullsfirst=False)
+        .order("id", desc=descending)
+        .limit(limit + 1)
+        .execute()
+    )
+
+    rows = res.data or []
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = {"value": rows[-1].get(sort), "id": rows[-1]["id"]}
+    return rows, next_after
+
+
+@timed("supabase.update_submission_grades")
+def update_submission_grades(rows):
+    """
+    Batch-write regraded score / plagiarism (and matches) / feedback. Each row needs the
+    submission's id, assignment_id, student_email and file_url.
+    """
+    if not rows:
+        return
+    rows = [dict(row) for row in rows]
+    for row in rows:
+        if row.get("plagiarism_matches") is not None:
+            row["plagiarism_match_count"] = len(row["plagiarism_matches"])
+    supabase = get_supabase()
+    supabase.table("submissions").upsert(rows, on_conflict="id").execute()
+
+    for assignment_id in {row["assignment_id"] for row in rows}:
+        invalidate("submissions", assignment_id)
+        invalidate("collusion", assignment_id)
+    for email in {row["student_email"] for row in rows}:
+        invalidate("student_submissions", email)
+    for row in rows:
+        invalidate("submission", row["id"])
+        invalidate_reports(row["id"])
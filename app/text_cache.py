@@ -0,0 +1,194 @@
+import hashlib
+import os
+import random
+import threading
+from collections import OrderedDict
+from flask import current_app
+from .metrics import increment
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _export(event, evicted=0, tier="memory"):
+    # stats also go to /metrics, which sums them over every process
+    if event:
+        increment("grader_text_cache_lookups_total", result=event)
+    if evicted:
+        increment("grader_text_cache_evictions_total", evicted, tier=tier)
+
+
+class TextCache:
+    """
+    Extracted-text cache: size-bounded in-memory LRU in front of an on-disk store.
+    Text is stored by SHA-256 of the source file; URLs map onto those hashes.
+    Roughly one put in SWEEP_EVERY trims the disk store to max_disk_bytes,
+    least recently used texts first.
+    """
+
+    SWEEP_EVERY = 64
+
+    def __init__(self, directory, max_memory_bytes, max_disk_bytes):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._texts = OrderedDict()  # content hash -> text
+        self._urls = {}  # url -> content hash
+        self._memory_bytes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+        os.makedirs(os.path.join(directory, "texts"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "urls"), exist_ok=True)
+
+    # ---------------- paths ---------------- #
+
+    def _text_path(self, content_hash):
+        return os.path.join(self.directory, "texts", f"{content_hash}.txt")
+
+    def _url_path(self, url):
+        return os.path.join(self.directory, "urls", sha256_hex(url.encode()))
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # ---------------- memory LRU ---------------- #
+
+    def _remember(self, content_hash, text):
+        # caller holds the lock; returns the number of texts evicted
+        if content_hash in self._texts:
+            self._texts.move_to_end(content_hash)
+            return 0
+        self._texts[content_hash] = text
+        self._memory_bytes += len(text)
+        evicted = 0
+        while self._memory_bytes > self.max_memory_bytes and len(self._texts) > 1:
+            old_hash, old_text = self._texts.popitem(last=False)
+            self._memory_bytes -= len(old_text)
+            evicted += 1
+            for url in [u for u, h in self._urls.items() if h == old_hash]:
+                del self._urls[url]
+        self.stats["evictions"] += evicted
+        return evicted
+
+    def _load(self, content_hash):
+        # caller holds the lock; returns (text, stats event, texts evicted)
+        text = self._texts.get(content_hash)
+        if text is not None:
+            self._texts.move_to_end(content_hash)
+            self.stats["hits"] += 1
+            return text, "hits", 0
+
+        path = self._text_path(content_hash)
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # recently used texts survive the disk sweep
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None, "misses", 0
+
+        self.stats["disk_hits"] += 1
+        return text, "disk_hits", self._remember(content_hash, text)
+
+    def _sweep(self):
+        """
+        Delete the least recently used texts until the store fits max_disk_bytes,
+        and URL links older than every text that is left.
+        """
+        texts = []
+        for entry in os.scandir(os.path.join(self.directory, "texts")):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            texts.append((stat.st_mtime, stat.st_size, entry.path))
+        texts.sort()
+
+        total, removed = sum(size for _, size, _ in texts), 0
+        while texts and total > self.max_disk_bytes:
+            _, size, path = texts.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if not removed:
+            return 0
+
+        # links older than every kept text may point at a removed one; dropping
+        # a live one only costs a re-extraction
+        oldest = texts[0][0] if texts else float("inf")
+        for entry in os.scandir(os.path.join(self.directory, "urls")):
+            try:
+                if entry.stat().st_mtime < oldest:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self.stats["disk_evictions"] += removed
+        return removed
+
+    # ---------------- public API ---------------- #
+
+    def get_by_url(self, url):
+        with self._lock:
+            content_hash = self._urls.get(url)
+            if content_hash is None:
+                try:
+                    with open(self._url_path(url), encoding="utf-8") as f:
+                        content_hash = f.read().strip()
+                except FileNotFoundError:
+                    content_hash = None
+                    self.stats["misses"] += 1
+
+            text, event, evicted = self._load(content_hash) if content_hash else (None, "misses", 0)
+            if text is not None:
+                self._urls[url] = content_hash
+        _export(event, evicted)
+        return text
+
+    def get_by_hash(self, content_hash):
+        with self._lock:
+            text, event, evicted = self._load(content_hash)
+        _export(event, evicted)
+        return text
+
+    def link_url(self, url, content_hash):
+        with self._lock:
+            self._urls[url] = content_hash
+        self._write_atomic(self._url_path(url), content_hash)
+
+    def put(self, content_hash, text, url=None):
+        self._write_atomic(self._text_path(content_hash), text)
+        with self._lock:
+            evicted = self._remember(content_hash, text)
+        if url:
+            self.link_url(url, content_hash)
+        _export(None, evicted)
+        if random.randrange(self.SWEEP_EVERY) == 0:
+            _export(None, self._sweep(), tier="disk")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_text_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                directory = current_app.config["TEXT_CACHE_DIR"]
+                if not os.path.isabs(directory):
+                    directory = os.path.join(current_app.instance_path, directory)
+                _cache = TextCache(
+                    directory, current_app.config["TEXT_CACHE_MAX_BYTES"], current_app.config["TEXT_CACHE_MAX_DISK_BYTES"]
+                )
+    return _cache
@@ -0,0 +1,124 @@
+import re
+import zlib
+from collections import deque
+
+# Winnowing (Schleimer et al.): hash every K-word window, keep the minimum hash of
+# each run of WINDOW consecutive windows. Any passage of at least K + WINDOW - 1
+# shared words yields a shared fingerprint; each hit is then extended word by word
+# to the full matching passage. Linear in the length of both documents.
+K = 5
+WINDOW = 4
+MIN_MATCH_WORDS = K + WINDOW - 1
+
+_WORD_RE = re.compile(r"\w+")
+_MOD = (1 << 61) - 1
+_BASE = 1_000_003
+
+
+def tokenize(text):
+    """
+    Lowercased words and their (start, end) character offsets in `text`.
+    """
+    words, offsets = [], []
+    for m in _WORD_RE.finditer(text or ""):
+        words.append(m.group().lower())
+        offsets.append(m.span())
+    return words, offsets
+
+
+def kgram_hashes(words):
+    """
+    Rolling hash of every K-word window, in order (empty below K words).
+    """
+    if len(words) < K:
+        return []
+    ids = [zlib.crc32(w.encode()) for w in words]
+    top = pow(_BASE, K - 1, _MOD)
+    h = 0
+    for v in ids[:K]:
+        h = (h * _BASE + v) % _MOD
+    hashes = [h]
+    for i in range(K, len(ids)):
+        h = ((h - ids[i - K] * top) * _BASE + ids[i]) % _MOD
+        hashes.append(h)
+    return hashes
+
+
+def fingerprints(words):
+    """
+    Winnowed (hash, word position) pairs; the rightmost minimum wins ties.
+    """
+    hashes = kgram_hashes(words)
+    if len(hashes) <= WINDOW:
+        return [(min(hashes), hashes.index(min(hashes)))] if hashes else []
+
+    selected = []
+    window = deque()  # positions with increasing hashes
+    for i, h in enumerate(hashes):
+        while window and hashes[window[-1]] >= h:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - WINDOW:
+            window.popleft()
+        if i >= WINDOW - 1 and (not selected or selected[-1][1] != window[0]):
+            selected.append((hashes[window[0]], window[0]))
+    return selected
+
+
+def match_spans(words_a, words_b, prints_a=None, prints_b=None):
+    """
+    Maximal shared passages as (a_start, a_end, b_start, b_end) word ranges,
+    at least MIN_MATCH_WORDS long, ordered by position in `words_a`.
+    """
+    prints_a = fingerprints(words_a) if prints_a is None else prints_a
+    prints_b = fingerprints(words_b) if prints_b is None else prints_b
+
+    positions_b = {}
+    for h, j in prints_b:
+        positions_b.setdefault(h, []).append(j)
+
+    spans = []
+    extended_to = {}  # diagonal (i - j) -> end of the last span found on it
+    for h, i in prints_a:
+        for j in positions_b.get(h, ()):
+            if i < extended_to.get(i - j, -1) or words_a[i:i + K] != words_b[j:j + K]:
+                continue
+            start_a, start_b = i, j
+            while start_a and start_b and words_a[start_a - 1] == words_b[start_b - 1]:
+                start_a -= 1
+                start_b -= 1
+            end_a, end_b = i + K, j + K
+            while end_a < len(words_a) and end_b < len(words_b) and words_a[end_a] == words_b[end_b]:
+                end_a += 1
+                end_b += 1
+            extended_to[i - j] = end_a
+            if end_a - start_a >= MIN_MATCH_WORDS:
+                spans.append((start_a, end_a, start_b, end_b))
+
+    spans.sort()
+    return spans
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+def highlight_segments(text, spans):
+    """
+    Split `text` into (segment, highlighted) pairs for the given character spans.
+    """
+    segments, pos = [], 0
+    for start, end in merge_ranges(spans):
+        if start > pos:
+            segments.append((text[pos:start], False))
+        segments.append((text[start:end], True))
+        pos = end
+    if pos < len(text or ""):
+        segments.append((text[pos:], False))
+    return segments
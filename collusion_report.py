@@ -0,0 +1,34 @@
+"""
+Build the all-pairs collusion report for an assignment ahead of time.
+
+    python collusion_report.py <assignment_id> [--threshold 60]
+"""
+import argparse
+
+from app import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the collusion report for an assignment.")
+    parser.add_argument("assignment_id")
+    parser.add_argument("--threshold", type=float, default=None, help="similarity percent (default from config)")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        from app.collusion import refresh_report
+
+        threshold = args.threshold / 100 if args.threshold is not None else None
+        report = refresh_report(args.assignment_id, threshold)
+
+    print(
+        f"{report['submissions']} submissions, {len(report['pairs'])} pairs >= {report['threshold']}%, "
+        f"{len(report['clusters'])} cluster(s) in {report['elapsed_ms']} ms"
+    )
+    for cluster in report["clusters"]:
+        emails = ", ".join(m["student_email"] for m in cluster["members"])
+        print(f"  max {cluster['max_similarity']}%  mean {cluster['mean_similarity']}%  {emails}")
+
+
+if __name__ == "__main__":
+    main()
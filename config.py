@@ -1,9 +1,33 @@
 import os
 
 class Config:
+    # External services or local stand-ins (see app/local_backends.py and loadtest.py):
+    # DATA_BACKEND supabase|local, STORAGE_BACKEND cloudinary|local, LLM_BACKEND openai|mock
+    DATA_BACKEND = os.environ.get("GRADER_DATA_BACKEND", "supabase")
+    STORAGE_BACKEND = os.environ.get("GRADER_STORAGE_BACKEND", "cloudinary")
+    LLM_BACKEND = os.environ.get("GRADER_LLM_BACKEND", "openai")
+    LOCAL_STORE_PATH = "local_store.db"
+    LOCAL_BLOB_DIR = "local_blobs"
+    MOCK_LLM_LATENCY = float(os.environ.get("GRADER_MOCK_LLM_LATENCY", "0.5"))  # seconds
+    MOCK_LLM_JITTER = 0.2
+    MOCK_LLM_MAX_CONCURRENCY = int(os.environ.get("GRADER_MOCK_LLM_MAX_CONCURRENCY", "0"))  # 429s beyond this; 0: none
+
     SECRET_KEY = "**************"
     SQLALCHEMY_DATABASE_URI = "sqlite:///app.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_pre_ping": True,
+    }
+    # Added to the engine's connect_args only when the URI is sqlite://
+    SQLITE_CONNECT_ARGS = {"timeout": 15, "check_same_thread": False}
+    # Applied to every new SQLite connection (WAL lets readers run during a write)
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 15000,
+    }
 
     # Cloudinary
     CLOUDINARY_CLOUD_NAME = "**********"
@@ -13,6 +37,109 @@ class Config:
     # Supabase
     SUPABASE_URL = "**********"
     SUPABASE_KEY = "**********"
+    SUPABASE_MAX_CONNECTIONS = 20
+    SUPABASE_MAX_KEEPALIVE = 10
+    SUPABASE_KEEPALIVE_EXPIRY = 60  # seconds
+    SUPABASE_TIMEOUT = 30  # seconds
+
+    # Read-through cache for Supabase reads. "sqlite" is shared by every
+    # process on the host (web + grading workers); "memory" is per process.
+    CACHE_BACKEND = "sqlite"
+    CACHE_PATH = "cache.db"
+    CACHE_MAX_ENTRIES = 5000
+    CACHE_TTLS = {  # seconds; 0 disables
+        "assignments": 300,
+        "assignment": 300,
+        "submissions": 60,
+        "student_submissions": 60,
+        "submission": 300,
+        "report": 7 * 24 * 3600,  # entries also carry a content version
+        "collusion": 7 * 24 * 3600,  # rebuilt on demand or by collusion_report.py
+        "fragment": 600,  # rendered page fragments; keyed by their rows' content version
+        "user": 60,  # Flask-Login user loader; evicted when the user row changes
+    }
+
+    # Professor submissions listing
+    SUBMISSIONS_PAGE_SIZE = 25
+
+    # Independent fetches within one request run side by side on this many threads
+    # (greenlets under serve.py) per process
+    PARALLEL_FETCH_WORKERS = 32
+
+    # PDF reports render on this many background threads per process
+    REPORT_RENDER_WORKERS = 2
+    REPORT_FAILURE_TTL = 30  # seconds a failed render answers with an error instead of retrying
 
     # open AI
     OPENAI_API_KEY = "**************"
+    OPENAI_MODEL = "gpt-4.1-mini"
+    OPENAI_TEMPERATURE = 0.2
+
+    # Shared LLM client (app/llm_client.py); limits are per process
+    LLM_TIMEOUT = 120  # seconds per call
+    LLM_REQUESTS_PER_MINUTE = 0  # token bucket; 0: no rate cap
+    LLM_BURST = 10
+    LLM_INITIAL_CONCURRENCY = 4  # AIMD limit on calls in flight
+    LLM_MIN_CONCURRENCY = 1
+    LLM_MAX_CONCURRENCY = 32
+    LLM_TARGET_LATENCY = 60  # seconds; slower calls shrink the limit (0: 429s only)
+    LLM_MAX_RETRIES = 4
+    LLM_RETRY_BACKOFF = 1  # seconds, doubled per retry and jittered
+    LLM_MAX_BACKOFF = 30
+    LLM_BREAKER_FAILURES = 5  # consecutive failures that open the circuit
+    LLM_BREAKER_COOLDOWN = 30  # seconds before a trial call
+
+    # Extracted text is cleaned (whitespace, repeated headers/footers, page
+    # numbers) before the prompt; longer texts are cut to this many tokens
+    # (0: no limit). "truncate" keeps the opening and the end, "summarize"
+    # first condenses each paragraph to its leading sentence.
+    EVALUATION_TOKEN_BUDGET = 30000
+    EVALUATION_BUDGET_STRATEGY = "truncate"
+
+    # Long submissions are reviewed in paragraph-aligned chunks, in parallel
+    EVALUATION_CHUNK_TOKENS = 6000
+    EVALUATION_CHUNK_CONCURRENCY = 4
+
+    # Memoized evaluations; identical concurrent requests wait on one call
+    EVALUATION_CACHE_PATH = "evaluations.db"
+    EVALUATION_CACHE_LEASE = 300  # seconds an in-flight call may hold its key
+    EVALUATION_CACHE_POLL = 0.5  # seconds between checks while waiting
+
+    # Plagiarism fingerprint index (relative paths live in the instance folder)
+    FINGERPRINT_INDEX_PATH = "fingerprints.db"
+    PLAGIARISM_MAX_CANDIDATES = 25  # LSH candidates verified passage by passage
+    PLAGIARISM_MAX_MATCHES = 20  # longest matched passages stored per submission
+
+    # Per-assignment score / plagiarism aggregates shown on the professor dashboard
+    ASSIGNMENT_STATS_PATH = "assignment_stats.db"
+
+    # All-pairs collusion report: pairs at or above this cosine similarity are linked
+    COLLUSION_THRESHOLD = 0.6
+
+    # Extracted .docx text cache
+    TEXT_CACHE_DIR = "text_cache"
+    TEXT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # in memory, per process
+    TEXT_CACHE_MAX_DISK_BYTES = 2 * 1024 * 1024 * 1024  # on disk, shared
+
+    # .docx downloads: hard size cap, and the point where buffers spill to disk
+    MAX_DOCX_BYTES = 20 * 1024 * 1024
+    DOCX_SPOOL_BYTES = 2 * 1024 * 1024
+
+    # Background grading queue (see worker.py)
+    GRADING_QUEUE_PATH = "grading_queue.db"
+    GRADING_UPLOAD_DIR = "grading_uploads"
+    GRADING_WORKERS = 2
+    GRADING_MAX_ATTEMPTS = 3
+    GRADING_RETRY_BACKOFF = 5  # seconds, doubled per attempt
+    GRADING_JOB_LEASE = 600  # seconds without a finished stage before a running job is reclaimed
+
+    # Bulk regrade checkpoints (see regrade.py)
+    REGRADE_CHECKPOINT_PATH = "regrade_checkpoints.db"
+
+    # Stage timings: /metrics (Prometheus) and Server-Timing response headers.
+    # Each process flushes its totals to METRICS_PATH so /metrics covers the workers too.
+    METRICS_PATH = "metrics.db"  # None: this process only
+    METRICS_FLUSH_INTERVAL = 5  # seconds
+    METRICS_RETENTION = 3600  # seconds without a flush before a snapshot is folded into one "retired" row
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")  # if set, /metrics needs "Authorization: Bearer <token>"
+    SERVER_TIMING = True
@@ -0,0 +1,325 @@
+"""
+Scripted load generator for GRADER's main journeys.
+
+In-process (default): builds the app against local stand-ins for Supabase,
+Cloudinary and OpenAI in a temporary instance folder, starts grading workers
+as threads, and drives it through Flask's test client:
+
+    python loadtest.py --users 20 --duration 60 --llm-latency 0.8
+
+Against a running server (start it and worker.py with GRADER_DATA_BACKEND=local,
+GRADER_STORAGE_BACKEND=local and GRADER_LLM_BACKEND=mock for an offline run):
+
+    python loadtest.py --base-url http://127.0.0.1:8000 --users 50 --duration 120
+
+Reports requests/sec and p50/p95/p99 per route.
+"""
+import argparse
+import io
+import math
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import defaultdict
+from urllib.parse import urlparse
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_SUBMIT_RE = re.compile(r"/student/submit/([^\"'/]+)")
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    "</Types>"
+)
+_WORDS = (
+    "analysis argument evidence method result discussion theory model data sample "
+    "conclusion literature approach design system student research study value effect"
+).split()
+
+
+def make_docx(seed, paragraphs=30):
+    rng = random.Random(seed)
+    body = "".join(
+        f"<w:p><w:r><w:t>{' '.join(rng.choices(_WORDS, k=40))}</w:t></w:r></w:p>" for _ in range(paragraphs)
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("word/document.xml", f'<w:document xmlns:w="{_W_NS}"><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+# ---------------- HTTP ADAPTERS ---------------- #
+
+class _Response:
+    def __init__(self, status, text, location, json_body=None):
+        self.status = status
+        self.text = text
+        self.location = location or ""
+        self.json = json_body
+
+
+class TestClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path):
+        r = self.client.get(path)
+        text = r.get_data().decode("utf-8", "replace")
+        return _Response(r.status_code, text, r.headers.get("Location"), r.get_json(silent=True))
+
+    def post(self, path, data, file=None):
+        data = dict(data)
+        if file:
+            data["file"] = (io.BytesIO(file[1]), file[0])
+        r = self.client.post(path, data=data, content_type="multipart/form-data" if file else None)
+        return _Response(r.status_code, r.get_data().decode("utf-8", "replace"), r.headers.get("Location"))
+
+
+class HTTPSession:
+    def __init__(self, base_url):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def _wrap(self, r):
+        try:
+            body = r.json()
+        except ValueError:
+            body = None
+        return _Response(r.status_code, r.text, r.headers.get("Location"), body)
+
+    def get(self, path):
+        return self._wrap(self.session.get(self.base_url + path, allow_redirects=False, timeout=120))
+
+    def post(self, path, data, file=None):
+        files = {"file": (file[0], file[1])} if file else None
+        return self._wrap(
+            self.session.post(self.base_url + path, data=data, files=files, allow_redirects=False, timeout=120)
+        )
+
+
+# ---------------- RECORDING ---------------- #
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def call(self, route, fn, *args, ok=(200, 302)):
+        start = time.perf_counter()
+        try:
+            response = fn(*args)
+        except Exception:
+            with self.lock:
+                self.errors[route] += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.latencies[route].append(elapsed)
+            if response.status not in ok:
+                self.errors[route] += 1
+        return response
+
+    def record(self, route, seconds):
+        with self.lock:
+            self.latencies[route].append(seconds)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def report(recorder, elapsed):
+    total = sum(len(v) for v in recorder.latencies.values())
+    print(f"\n{total} requests in {elapsed:.1f}s — {total / elapsed:.1f} req/s overall\n")
+    print(f"{'route':<44} {'count':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for route in sorted(recorder.latencies):
+        values = recorder.latencies[route]
+        print(
+            f"{route:<44} {len(values):>7} {len(values) / elapsed:>8.2f}"
+            f" {percentile(values, 50) * 1000:>9.0f} {percentile(values, 95) * 1000:>9.0f}"
+            f" {percentile(values, 99) * 1000:>9.0f} {recorder.errors.get(route, 0):>7}"
+        )
+
+
+# ---------------- JOURNEYS ---------------- #
+
+def register_and_login(session, rec, role):
+    email = f"{role}-{uuid.uuid4().hex[:12]}@loadtest.local"
+    form = {"full_name": f"Load {role}", "email": email, "password": "loadtest", "role": role}
+    rec.call("POST /auth/register", session.post, "/auth/register", form)
+    rec.call("POST /auth/login", session.post, "/auth/login", {"email": email, "password": "loadtest"})
+    return email
+
+
+def student_journey(session, rec, seed, grade_timeout):
+    dashboard = rec.call("GET /student/dashboard", session.get, "/student/dashboard")
+    assignment_ids = _SUBMIT_RE.findall(dashboard.text)
+    if not assignment_ids:
+        return
+    assignment_id = assignment_ids[seed % len(assignment_ids)]
+
+    submitted = time.perf_counter()
+    resp = rec.call(
+        "POST /student/submit/<id>",
+        session.post,
+        f"/student/submit/{assignment_id}",
+        {},
+        (f"essay-{seed}.docx", make_docx(seed)),
+    )
+    job_path = urlparse(resp.location).path
+    if "/student/job/" not in job_path:
+        return
+
+    result_url = None
+    while time.perf_counter() - submitted < grade_timeout:
+        status = rec.call("GET /student/job/<id>/status", session.get, f"{job_path}/status")
+        body = status.json or {}
+        if body.get("result_url") or body.get("status") == "failed":
+            result_url = body.get("result_url")
+            break
+        time.sleep(0.5)
+    if not result_url:
+        return
+    rec.record("(submit → graded)", time.perf_counter() - submitted)
+
+    rec.call("GET /student/result/<a>/<s>", session.get, result_url)
+    download_report(
+        rec, "GET /student/download-report/<a>/<s>", session, result_url.replace("/student/result/", "/student/download-report/")
+    )
+
+
+def download_report(rec, route, session, url, attempts=10):
+    # a report that is not rendered yet answers 202; retry like the browser does
+    for _ in range(attempts):
+        response = rec.call(route, session.get, url, ok=(200, 202, 302))
+        if response.status != 202:
+            return response
+        time.sleep(1)
+    with rec.lock:
+        rec.errors[route] += 1
+
+
+def professor_journey(session, rec):
+    dashboard = rec.call("GET /professor/dashboard", session.get, "/professor/dashboard")
+    for assignment_id in re.findall(r"/professor/submissions/([^\"'/?]+)", dashboard.text)[:1]:
+        listing = rec.call("GET /professor/submissions/<id>", session.get, f"/professor/submissions/{assignment_id}")
+        for pdf in re.findall(r"/professor/report/[^\"']+/pdf", listing.text)[:1]:
+            download_report(rec, "GET /professor/report/<a>/<s>/pdf", session, pdf)
+
+
+def virtual_user(make_session, rec, index, deadline, grade_timeout, professor_every):
+    session = make_session()
+    if professor_every and index % professor_every == 0:
+        register_and_login(session, rec, "professor")
+        while time.time() < deadline:
+            professor_journey(session, rec)
+        return
+
+    register_and_login(session, rec, "student")
+    seed = index * 100_000
+    while time.time() < deadline:
+        seed += 1
+        try:
+            student_journey(session, rec, seed, grade_timeout)
+        except Exception as e:
+            print("journey error:", e)
+
+
+# ---------------- MAIN ---------------- #
+
+def build_local_app(args):
+    from app import create_app
+
+    instance = tempfile.mkdtemp(prefix="grader-loadtest-")
+    config = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{instance}/app.db",
+        "DATA_BACKEND": "local",
+        "STORAGE_BACKEND": "local",
+        "LLM_BACKEND": "mock",
+        "MOCK_LLM_LATENCY": args.llm_latency,
+        "MOCK_LLM_MAX_CONCURRENCY": args.llm_max_concurrency,
+    }
+    app = create_app(config=config, instance_path=instance)
+    with app.app_context():
+        from app import migrate
+        from app.supabase_service import create_assignment
+
+        migrate()
+
+        for n in range(args.assignments):
+            create_assignment(f"Load test assignment {n + 1}", "Generated by loadtest.py", None)
+    print(f"Local instance folder: {instance}")
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test GRADER's main journeys.")
+    parser.add_argument("--base-url", help="test a running server instead of an in-process app")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--professor-every", type=int, default=10, help="every Nth user is a professor (0: none)")
+    parser.add_argument("--grade-timeout", type=float, default=60, help="seconds to wait for a grade")
+    parser.add_argument("--assignments", type=int, default=3, help="assignments to seed (in-process only)")
+    parser.add_argument("--workers", type=int, default=4, help="grading worker threads (in-process only)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="mock LLM latency in seconds (in-process only)")
+    parser.add_argument(
+        "--llm-max-concurrency", type=int, default=0, help="mock LLM answers 429 beyond this many calls (in-process only)"
+    )
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    worker_threads = []
+    if args.base_url:
+        make_session = lambda: HTTPSession(args.base_url)
+    else:
+        app = build_local_app(args)
+        make_session = lambda: TestClientSession(app)
+
+        def run_grading_worker():
+            from app.grading_queue import run_worker
+
+            with app.app_context():
+                run_worker(poll_interval=0.2, stop_event=stop)
+
+        worker_threads = [threading.Thread(target=run_grading_worker, daemon=True) for _ in range(args.workers)]
+        for t in worker_threads:
+            t.start()
+
+    rec = Recorder()
+    deadline = time.time() + args.duration
+    users = [
+        threading.Thread(
+            target=virtual_user,
+            args=(make_session, rec, i, deadline, args.grade_timeout, args.professor_every),
+            daemon=True,
+        )
+        for i in range(args.users)
+    ]
+    started = time.perf_counter()
+    for u in users:
+        u.start()
+    for u in users:
+        u.join()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    for t in worker_threads:
+        t.join(timeout=5)
+    report(rec, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Regrade (or backfill) every submission of an assignment.
+
+    python regrade.py <assignment_id> [--workers 4] [--mode thread|process] [--batch-size 50]
+
+Progress is checkpointed in the instance folder; re-running the same command
+after an interruption skips submissions that were already written back.
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from app import create_app
+
+STAGES = ("extract", "evaluate", "plagiarism")
+
+_app = None
+
+
+# ---------------- CHECKPOINT ---------------- #
+
+def _connect(app):
+    path = os.path.join(app.instance_path, app.config["REGRADE_CHECKPOINT_PATH"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS regrade_progress (
+            assignment_id TEXT NOT NULL,
+            submission_id TEXT NOT NULL,
+            row TEXT NOT NULL,
+            written INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (assignment_id, submission_id)
+        )
+        """
+    )
+    return conn
+
+
+# ---------------- WORKER ---------------- #
+
+def _init_process():
+    global _app
+    _app = create_app()
+
+
+def _grade_one(submission):
+    from app.evaluation import extract_text_from_docx_url, evaluate_text
+    from app.plagiarism import plagiarism_report
+
+    timings = {}
+    with _app.app_context():
+        start = time.perf_counter()
+        text = extract_text_from_docx_url(submission["file_url"])
+        timings["extract"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        score, feedback = evaluate_text(text)
+        timings["evaluate"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        plagiarism = plagiarism_report(submission["assignment_id"], submission["file_url"], text)
+        timings["plagiarism"] = time.perf_counter() - start
+
+    row = {
+        "id": submission["id"],
+        "assignment_id": submission["assignment_id"],
+        "student_email": submission["student_email"],
+        "file_url": submission["file_url"],
+        "score": score,
+        "plagiarism_percent": plagiarism["percent"],
+        "plagiarism_matches": plagiarism["matches"],
+        "feedback": feedback,
+    }
+    return row, timings
+
+
+# ---------------- REPORTING ---------------- #
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _report(done, elapsed, timings):
+    print(f"\nRegraded {done} submission(s) in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.2f} submissions/sec)")
+    for stage in STAGES:
+        values = timings[stage]
+        if not values:
+            continue
+        print(
+            f"  {stage:<11} p50 {percentile(values, 50) * 1000:8.0f} ms"
+            f"  p95 {percentile(values, 95) * 1000:8.0f} ms"
+            f"  p99 {percentile(values, 99) * 1000:8.0f} ms"
+        )
+
+
+# ---------------- MAIN ---------------- #
+
+def regrade(app, assignment_id, workers, mode, batch_size):
+    global _app
+    from app.supabase_service import iter_submissions_for_assignment, update_submission_grades
+
+    assignment_id = str(assignment_id)
+    conn = _connect(app)
+    pending = [
+        json.loads(r[0])
+        for r in conn.execute(
+            "SELECT row FROM regrade_progress WHERE assignment_id = ? AND written = 0", (assignment_id,)
+        )
+    ]
+
+    flushed = 0
+
+    def flush():
+        nonlocal flushed
+        if not pending:
+            return
+        update_submission_grades(pending)
+        flushed += len(pending)
+        with conn:
+            conn.executemany(
+                "UPDATE regrade_progress SET written = 1 WHERE assignment_id = ? AND submission_id = ?",
+                [(assignment_id, str(r["id"])) for r in pending],
+            )
+        pending.clear()
+
+    # graded-but-unwritten rows from an interrupted run
+    flush()
+    finished_ids = {
+        r[0]
+        for r in conn.execute("SELECT submission_id FROM regrade_progress WHERE assignment_id = ?", (assignment_id,))
+    }
+
+    timings = {stage: [] for stage in STAGES}
+    done = 0
+    failed = 0
+    skipped = 0
+    started = time.perf_counter()
+
+    if mode == "process":
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process)
+    else:
+        _app = app
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    def collect(finished):
+        nonlocal done, failed
+        for fut in finished:
+            try:
+                row, stage_timings = fut.result()
+            except Exception as e:
+                # left out of the checkpoint, so the next run retries it
+                print("  regrade failed:", e, flush=True)
+                failed += 1
+                continue
+            for stage, seconds in stage_timings.items():
+                timings[stage].append(seconds)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO regrade_progress (assignment_id, submission_id, row, written) VALUES (?, ?, ?, 0)",
+                    (assignment_id, str(row["id"]), json.dumps(row)),
+                )
+            pending.append(row)
+            done += 1
+            if len(pending) >= batch_size:
+                flush()
+                elapsed = time.perf_counter() - started
+                print(f"  {done} regraded ({done / elapsed:.2f}/sec)", flush=True)
+
+    columns = "id, assignment_id, student_email, file_url, created_at"
+    in_flight = set()
+    with executor:
+        for submission in iter_submissions_for_assignment(assignment_id, columns=columns):
+            if str(submission["id"]) in finished_ids:
+                skipped += 1
+                continue
+            if not submission.get("file_url"):
+                continue
+            in_flight.add(executor.submit(_grade_one, submission))
+            # bounded window keeps memory flat however large the assignment is
+            if len(in_flight) >= workers * 2:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+        finished, _ = wait(in_flight)
+        collect(finished)
+
+    flush()
+    if flushed:
+        # regraded scores replace old ones, which an incremental update cannot undo;
+        # this includes rows an interrupted run graded but only wrote now
+        from app.assignment_stats import rebuild
+
+        rebuild(assignment_id)
+    if skipped:
+        print(f"Skipped {skipped} submission(s) finished by an earlier run.")
+    if failed:
+        print(f"{failed} submission(s) failed; re-run to retry them.")
+    _report(done, time.perf_counter() - started, timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regrade all submissions of an assignment.")
+    parser.add_argument("assignment_id")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--batch-size", type=int, default=50, help="rows per Supabase write")
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint and regrade everything")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.restart:
+            conn = _connect(app)
+            with conn:
+                conn.execute("DELETE FROM regrade_progress WHERE assignment_id = ?", (str(args.assignment_id),))
+        regrade(app, args.assignment_id, args.workers, args.mode, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
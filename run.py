@@ -1,6 +1,9 @@
+import os
+
 from app import create_app
 
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # development server; see serve.py for serving many concurrent requests
+    app.run(debug=os.environ.get("FLASK_DEBUG", "1") == "1", threaded=True)
@@ -0,0 +1,49 @@
+"""
+Production-style server in which one process keeps many requests in flight.
+
+gevent monkey-patches sockets, threads and sleeps, so every network call to
+Supabase (httpx), Cloudinary and OpenAI yields to the event loop instead of
+holding an OS thread:
+
+    pip install gevent
+    python serve.py --port 8000 --max-connections 1000
+
+Equivalent under gunicorn: gunicorn -k gevent --worker-connections 1000 run:app
+
+sqlite3 is not cooperative. Calls to the local SQLite files (the shared cache
+with CACHE_BACKEND = "sqlite", the grading queue, the user database) run on the
+event loop and block every greenlet of the process while they run, including
+any wait for a lock held by a grading worker (up to the connection's busy
+timeout). They are short local calls, but under heavy write contention run
+several processes (gunicorn -w N -k gevent) rather than one. CACHE_BACKEND =
+"memory" takes the cache off SQLite, but then invalidations from the grading
+workers (worker.py, separate processes) do not reach the web process and pages
+can be stale until the CACHE_TTLS entry expires.
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse  # noqa: E402
+
+from gevent.pool import Pool  # noqa: E402
+from gevent.pywsgi import WSGIServer  # noqa: E402
+
+from app import create_app  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve GRADER on a gevent event loop.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-connections", type=int, default=1000, help="requests in flight per process")
+    args = parser.parse_args()
+
+    app = create_app()
+    server = WSGIServer((args.host, args.port), app, spawn=Pool(args.max_connections))
+    print(f"Serving on http://{args.host}:{args.port} (up to {args.max_connections} concurrent requests)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Cold-start benchmark: wall time of each startup scenario in a fresh interpreter,
+plus the cumulative import cost per module (python -X importtime).
+
+    python startup_bench.py                       # table of scenarios and top imports
+    python startup_bench.py --save baseline.json  # record a baseline
+    python startup_bench.py --compare baseline.json --tolerance 20
+
+With --compare the exit status is 1 when a scenario got slower than the baseline
+by more than --tolerance percent, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# each runs in a new interpreter, so every scenario pays the full cold start
+_APP = (
+    "import tempfile; from app import create_app; "
+    "d = tempfile.mkdtemp(); app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + d + '/app.db'}, instance_path=d)"
+)
+SCENARIOS = {
+    "import app": "import app",
+    "create_app": _APP,
+    "first request": _APP + "; app.test_client().get('/')",
+    "worker boot": _APP + "; import app.grading_queue",
+    "regrade boot": _APP + "; import app.evaluation, app.plagiarism",
+}
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_scenario(code):
+    """
+    (wall seconds, {module: (self us, cumulative us)}) for one fresh interpreter.
+    """
+    wrapped = f"import time; _t = time.perf_counter(); {code}; print('WALL', time.perf_counter() - _t)"
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", wrapped],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode:
+        raise RuntimeError(f"scenario failed:\n{proc.stderr[-2000:]}")
+
+    wall = float(re.search(r"WALL ([\d.e-]+)", proc.stdout).group(1))
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m:
+            modules[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+    return wall, modules
+
+
+def measure(repeat):
+    results = {}
+    for name, code in SCENARIOS.items():
+        walls, imports = [], {}
+        for _ in range(repeat):
+            wall, modules = run_scenario(code)
+            walls.append(wall)
+            for module, (_, cumulative) in modules.items():
+                imports.setdefault(module, []).append(cumulative)
+        results[name] = {
+            "wall_ms": round(statistics.median(walls) * 1000, 1),
+            "imports_ms": {m: round(statistics.median(v) / 1000, 2) for m, v in imports.items()},
+        }
+    return results
+
+
+def _top_level(module):
+    return module.split(".")[0]
+
+
+def print_report(results, top):
+    print(f"{'scenario':<16} {'wall ms':>9} {'modules':>8}")
+    for name, result in results.items():
+        print(f"{name:<16} {result['wall_ms']:>9.1f} {len(result['imports_ms']):>8}")
+
+    # packages by cumulative cost of their top-level import, in the heaviest scenario
+    heaviest = max(results.values(), key=lambda r: r["wall_ms"])
+    packages = {m: ms for m, ms in heaviest["imports_ms"].items() if "." not in m}
+    app_modules = {m: ms for m, ms in heaviest["imports_ms"].items() if _top_level(m) in ("app", "config")}
+    print(f"\nTop {top} packages by cumulative import time (ms):")
+    for module, ms in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {module:<40} {ms:>8.1f}")
+    print("\nApp modules (ms, cumulative):")
+    for module, ms in sorted(app_modules.items(), key=lambda kv: -kv[1]):
+        print(f"  {module:<40} {ms:>8.1f}")
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name, {}).get("wall_ms")
+        if not before:
+            continue
+        change = (result["wall_ms"] - before) / before * 100
+        print(f"{name:<16} {before:>9.1f} -> {result['wall_ms']:>9.1f} ms ({change:+.0f}%)")
+        if change > tolerance:
+            regressions.append(name)
+
+        new_modules = set(result["imports_ms"]) - set(baseline[name].get("imports_ms", {}))
+        new_packages = sorted({_top_level(m) for m in new_modules})
+        if new_packages:
+            print(f"  newly imported: {', '.join(new_packages)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure GRADER's cold-start and per-module import cost.")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario (median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from --save")
+    parser.add_argument("--tolerance", type=float, default=20, help="allowed slowdown in percent")
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    print_report(results, args.top)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nSlower than baseline by more than {args.tolerance:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+-- Student dashboard: fetch one student's submissions without scanning the table.
+create index if not exists submissions_student_email_created_at_idx
+    on public.submissions (student_email, created_at);
+
+-- Needed for the submissions -> assignments embedded select.
+do $$
+begin
+    if not exists (
+        select 1 from pg_constraint where conname = 'submissions_assignment_id_fkey'
+    ) then
+        alter table public.submissions
+            add constraint submissions_assignment_id_fkey
+            foreign key (assignment_id) references public.assignments (id);
+    end if;
+end $$;
@@ -0,0 +1,7 @@
+-- Keyset pagination for exports and bulk regrades: (created_at, id) per assignment
+-- and across the whole course.
+create index if not exists submissions_assignment_created_at_id_idx
+    on public.submissions (assignment_id, created_at, id);
+
+create index if not exists submissions_created_at_id_idx
+    on public.submissions (created_at, id);
@@ -0,0 +1,9 @@
+-- Sorted keyset pages for the professor submissions listing.
+create index if not exists submissions_assignment_score_id_idx
+    on public.submissions (assignment_id, score, id);
+
+create index if not exists submissions_assignment_plagiarism_id_idx
+    on public.submissions (assignment_id, plagiarism_percent, id);
+
+create index if not exists submissions_assignment_email_id_idx
+    on public.submissions (assignment_id, student_email, id);
@@ -0,0 +1,4 @@
+-- Matched passages behind plagiarism_percent: [{submission_id, student_email,
+-- start, end, source_start, source_end, words, excerpt}, ...], longest first.
+alter table public.submissions
+    add column if not exists plagiarism_matches jsonb;
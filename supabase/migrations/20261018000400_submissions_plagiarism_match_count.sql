@@ -0,0 +1,8 @@
+-- Number of matched passages, so the submissions listing can show it without
+-- selecting the plagiarism_matches JSON of every row.
+alter table public.submissions
+    add column if not exists plagiarism_match_count integer;
+
+update public.submissions
+    set plagiarism_match_count = jsonb_array_length(plagiarism_matches)
+    where plagiarism_matches is not null and plagiarism_match_count is null;
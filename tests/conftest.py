@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+# the tests import the app package from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _reset_singletons():
+    # per-process clients and stores are built from the first app's config;
+    # each test gets its own instance folder, so start them afresh
+    from app import cache, llm_client, metrics, reports, supabase_service, text_cache
+
+    if reports._render_pool is not None:
+        reports._render_pool.shutdown(wait=True)
+    reports._render_pool = None
+    reports._rendering.clear()
+    cache._backend = None
+    supabase_service._client = None
+    text_cache._cache = None
+    llm_client._client = None
+    metrics._registry = metrics._Registry()
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    create_app(config overrides) on a SQLite database in the test's tmp_path.
+    """
+    from app import create_app
+
+    _reset_singletons()
+    yield lambda **config: create_app(
+        {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/app.db", **config}, instance_path=str(tmp_path)
+    )
+    _reset_singletons()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
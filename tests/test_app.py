@@ -0,0 +1,11 @@
+from app import _engine_options
+from config import Config
+
+
+def test_sqlite_connect_args_only_for_sqlite_uris():
+    def options(uri):
+        return _engine_options({**vars(Config), "SQLALCHEMY_DATABASE_URI": uri})
+
+    assert options("sqlite:///app.db")["connect_args"] == {"timeout": 15, "check_same_thread": False}
+    assert "connect_args" not in options("postgresql://grader@db/grader")
+    assert options("postgresql://grader@db/grader")["pool_size"] == 10
@@ -0,0 +1,96 @@
+import math
+import statistics
+import threading
+import time
+
+import pytest
+
+from app.assignment_stats import BIN_WIDTH, _add, _empty, _median, get_stats, rebuild, record_submission
+
+
+def test_welford_matches_two_pass_mean_and_variance():
+    scores = [72, 88.5, 91, 40, 65, 65, 99.25, 0, 100]
+    stats = _empty("a")
+    for score in scores:
+        _add(stats, score, None)
+
+    assert stats["scored"] == len(scores)
+    assert stats["score_mean"] == pytest.approx(statistics.fmean(scores))
+    assert stats["score_m2"] / len(scores) == pytest.approx(statistics.pvariance(scores))
+    assert (stats["score_min"], stats["score_max"]) == (0, 100)
+    assert sum(stats["score_histogram"]) == len(scores)
+    assert stats["score_histogram"][-1] == 3  # 91, 99.25 and 100 share the top bin
+
+
+def test_missing_scores_count_as_submissions_only():
+    stats = _empty("a")
+    _add(stats, None, 12.5)
+    _add(stats, 80, None)
+
+    assert stats["submissions"] == 2
+    assert stats["scored"] == 1
+    assert stats["plagiarism_count"] == 1
+    assert stats["plagiarism_mean"] == 12.5
+
+
+def test_median_interpolates_within_its_bin():
+    histogram = [0] * 10
+    histogram[7] = 4  # four scores in [70, 80)
+    assert _median(histogram, 4, 70, 79) == pytest.approx(7.5 * BIN_WIDTH)
+
+
+def test_median_is_clamped_to_the_observed_range():
+    histogram = [0] * 10
+    histogram[5] = 1
+    assert _median(histogram, 1, 52, 52) == 52
+    assert _median([0] * 10, 0, None, None) is None
+
+
+def test_recorded_stats_round_trip(app):
+    with app.app_context():
+        for score in (60, 70, 80):
+            record_submission(1, f"s{score}", score, 5.0)
+        stats = get_stats([1, 2])
+
+    assert stats["1"]["score_mean"] == pytest.approx(70)
+    assert stats["1"]["score_std"] == pytest.approx(math.sqrt(200 / 3))
+    # an estimate: the middle of the [70, 80) bin, where the middle score falls
+    assert stats["1"]["score_median"] == pytest.approx(75)
+    assert stats["2"]["submissions"] == 0
+    assert stats["2"]["score_std"] is None
+
+
+def test_a_submission_is_counted_once(app):
+    with app.app_context():
+        record_submission(1, "s1", 70, None)
+        record_submission(1, "s1", 70, None)
+        assert get_stats([1])["1"]["submissions"] == 1
+
+
+def test_submissions_recorded_during_a_rebuild_are_neither_lost_nor_doubled(app, monkeypatch):
+    from app import supabase_service
+
+    def record(submission_id, score):
+        with app.app_context():
+            record_submission(1, submission_id, score, None)
+
+    racing = []
+
+    def scan(assignment_id, columns):
+        yield {"id": "old", "score": 50, "plagiarism_percent": None, "created_at": "1"}
+        # recorded while the scan runs: one row the scan also reads, one it misses
+        racing.extend(threading.Thread(target=record, args=args) for args in (("seen", 60), ("unseen", 90)))
+        for thread in racing:
+            thread.start()
+        time.sleep(0.1)
+        yield {"id": "seen", "score": 60, "plagiarism_percent": None, "created_at": "2"}
+
+    monkeypatch.setattr(supabase_service, "iter_submissions_for_assignment", scan)
+    with app.app_context():
+        rebuild(1)
+        for thread in racing:
+            thread.join()
+        stats = get_stats([1])["1"]
+
+    assert stats["submissions"] == 3
+    assert stats["score_mean"] == pytest.approx((50 + 60 + 90) / 3)
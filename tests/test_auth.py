@@ -0,0 +1,25 @@
+from app import cache, db, migrate
+from app.auth_routes import load_user
+from app.models import User
+
+
+def test_user_changes_evict_the_shared_cache_entry(app, tmp_path):
+    with app.app_context():
+        migrate()
+        user = User(full_name="Ada", email="ada@example.com", password_hash="x", role="student")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        assert load_user(str(user_id)).role == "student"
+        # another worker process sees the same entry through the cache file
+        other_worker = cache.SQLiteBackend(str(tmp_path / "cache.db"), 100)
+        key = cache.cache_key("user", user_id)
+        assert other_worker.get(key) is not None
+
+        db.session.get(User, user_id).role = "professor"
+        db.session.commit()
+        assert other_worker.get(key) is None
+        db.session.remove()
+
+        assert load_user(str(user_id)).role == "professor"
@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+from app.cache import SQLiteBackend
+
+
+def _backend(tmp_path, max_entries=100):
+    return SQLiteBackend(str(tmp_path / "cache.db"), max_entries)
+
+
+def test_get_returns_live_entries_only(tmp_path):
+    cache = _backend(tmp_path)
+    cache.set("live", b"a", 60)
+    cache.set("expired", b"b", -1)
+    assert cache.get("live") == b"a"
+    assert cache.get("expired") is None
+    assert cache.get("missing") is None
+
+
+def test_get_does_not_write(tmp_path):
+    cache = _backend(tmp_path)
+    cache.set("key", b"value", 60)
+    # a reader holding the write lock would make get() wait for it
+    blocker = sqlite3.connect(str(tmp_path / "cache.db"))
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        start = time.monotonic()
+        assert cache.get("key") == b"value"
+        assert time.monotonic() - start < 1
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+
+def test_trim_drops_expired_then_oldest_insertions(tmp_path):
+    cache = _backend(tmp_path, max_entries=3)
+    cache.TRIM_EVERY = 1
+    cache.set("expired", b"x", -1)
+    for i in range(5):
+        cache.set(f"k{i}", b"v", 60)
+    cache.set("k1", b"refreshed", 60)  # re-inserted, so newest
+
+    conn = sqlite3.connect(str(tmp_path / "cache.db"))
+    keys = {row[0] for row in conn.execute("SELECT key FROM cache")}
+    conn.close()
+    assert keys == {"k3", "k4", "k1"}
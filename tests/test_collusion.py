@@ -0,0 +1,47 @@
+import random
+
+from app.collusion import collusion_report, find_clusters, similar_pairs, tfidf_matrix
+
+
+def _text(n, seed):
+    rng = random.Random(seed)
+    return " ".join(f"w{rng.randrange(3000)}" for _ in range(n))
+
+
+def test_identical_texts_are_similar_and_unrelated_ones_are_not():
+    base = _text(400, 1)
+    x = tfidf_matrix([base, base, _text(400, 2)])
+    pairs = similar_pairs(x, 0.6)
+    assert [(i, j) for i, j, _ in pairs] == [(0, 1)]
+    assert abs(pairs[0][2] - 1.0) < 1e-9
+
+
+def test_find_clusters_joins_transitive_pairs():
+    clusters = find_clusters(6, [(0, 1, 0.9), (1, 2, 0.8), (4, 5, 0.7)])
+    assert sorted(sorted(c) for c in clusters) == [[0, 1, 2], [4, 5]]
+    assert find_clusters(3, []) == []
+
+
+def test_collusion_report_describes_rings():
+    ring = _text(300, 3)
+    texts = [ring, ring + " " + _text(20, 4), _text(300, 5), ring]
+    submissions = [{"id": i, "student_email": f"s{i}@example.com"} for i in range(len(texts))]
+    report = collusion_report(submissions, texts, 0.6)
+    assert report["submissions"] == 4
+    assert len(report["clusters"]) == 1
+    members = {m["submission_id"] for m in report["clusters"][0]["members"]}
+    assert members == {0, 1, 3}
+    assert report["pairs"][0]["similarity"] >= report["pairs"][-1]["similarity"]
+    assert "generated_at" in report
+
+
+def test_stored_report_is_dropped_when_a_submission_arrives(make_app):
+    from app.collusion import get_stored_report, refresh_report
+    from app.supabase_service import add_submission
+
+    app = make_app(DATA_BACKEND="local")
+    with app.app_context():
+        refresh_report("1")
+        assert get_stored_report("1") is not None
+        add_submission("1", "s@example.com", "file:///s.docx", 80, 0.0, "ok")
+        assert get_stored_report("1") is None
@@ -0,0 +1,29 @@
+from flask import g, request
+
+from app.concurrency import in_parallel
+from app.metrics import timed
+
+
+def _timed_call(stage, value):
+    def call():
+        with timed(stage):
+            return value
+
+    return call
+
+
+def test_parallel_calls_keep_order_and_request_context(app):
+    with app.test_request_context("/probe?x=1"):
+        results = in_parallel(lambda: 1, lambda: request.args["x"], lambda: request.path)
+    assert results == [1, "1", "/probe"]
+
+
+def test_parallel_timings_reach_server_timing(app):
+    with app.test_request_context("/"):
+        in_parallel(_timed_call("first", 1), _timed_call("second", 2), _timed_call("third", 3))
+        assert set(g.server_timing) == {"first", "second", "third"}
+
+
+def test_parallel_calls_outside_a_request(app):
+    with app.app_context():
+        assert in_parallel(_timed_call("a", 1), _timed_call("b", 2)) == [1, 2]
@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.professor_routes import _decode_cursor, _encode_cursor
+
+
+@pytest.mark.parametrize(
+    "after",
+    [
+        {"value": "2026-10-18T09:30:00+00:00", "id": 41},
+        {"value": 87.5, "id": "a1b2"},
+        {"value": None, "id": 3},
+        {"value": "O'Brien & co / élève", "id": 9},
+    ],
+)
+def test_cursor_round_trips(after):
+    cursor = _encode_cursor(after)
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+    assert _decode_cursor(cursor) == after
+
+
+def test_non_json_values_are_encoded_as_strings():
+    when = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    assert _decode_cursor(_encode_cursor({"value": when, "id": 1})) == {"value": str(when), "id": 1}
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        base64.urlsafe_b64encode(b"{not json").decode(),
+        base64.urlsafe_b64encode(json.dumps([1, 2]).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps({"id": 1}).encode()).decode(),
+    ],
+)
+def test_invalid_cursor_decodes_to_none(cursor):
+    assert _decode_cursor(cursor) is None
@@ -0,0 +1,29 @@
+import csv
+import io
+
+import pytest
+
+from app.exports import iter_csv, iter_export
+
+
+def _rows(data):
+    return list(csv.DictReader(io.StringIO("".join(data))))
+
+
+@pytest.mark.parametrize("email", ["=HYPERLINK(\"http://x\")", "+1", "-2+3", "@SUM(A1)", "\tx", "\rx"])
+def test_formula_cells_are_quoted(email):
+    [row] = _rows(iter_csv([{"student_email": email, "score": -5}]))
+    assert row["student_email"] == "'" + email
+    assert row["score"] == "-5"
+
+
+def test_plain_values_are_unchanged():
+    source = {
+        "id": 3,
+        "assignment_id": 1,
+        "student_email": "s@example.com",
+        "score": 81.5,
+        "assignments": {"title": "Essay 1"},
+    }
+    [row] = _rows(iter_export([source], "csv"))
+    assert (row["student_email"], row["assignment_title"], row["score"]) == ("s@example.com", "Essay 1", "81.5")
@@ -0,0 +1,52 @@
+import random
+
+import numpy as np
+
+from app.fingerprint_index import BANDS, NUM_PERM, lsh_buckets, minhash_signature
+
+
+def _text(n, seed):
+    rng = random.Random(seed)
+    return " ".join(f"w{rng.randrange(5000)}" for _ in range(n))
+
+
+def _shared_buckets(a, b):
+    return len(set(lsh_buckets(minhash_signature(a))) & set(lsh_buckets(minhash_signature(b))))
+
+
+def test_signature_is_deterministic():
+    text = _text(500, 1)
+    signature = minhash_signature(text)
+    assert signature.shape == (NUM_PERM,)
+    assert np.array_equal(signature, minhash_signature(text))
+    assert len(lsh_buckets(signature)) == BANDS
+
+
+def test_short_texts_have_no_signature():
+    assert minhash_signature("too short") is None
+    assert minhash_signature("") is None
+
+
+def test_partial_copy_shares_buckets_and_unrelated_text_does_not():
+    source = _text(3000, 2)
+    copied = " ".join(source.split()[1000:1150])  # 5% of the source
+    new = _text(1500, 3) + " " + copied + " " + _text(1350, 4)
+    assert _shared_buckets(source, new) > 0
+    assert _shared_buckets(source, _text(3000, 5)) == 0
+
+
+def test_query_ranks_the_copied_source_first(app):
+    from app.fingerprint_index import add_fingerprint, query_candidates
+
+    source = _text(3000, 2)
+    new = _text(1500, 3) + " " + " ".join(source.split()[1000:1150])
+    with app.app_context():
+        add_fingerprint(1, "file:///source.docx", source)
+        add_fingerprint(1, "file:///unrelated.docx", _text(3000, 5))
+        add_fingerprint(2, "file:///other-assignment.docx", source)
+        # re-adding a file replaces its buckets rather than doubling them
+        add_fingerprint(1, "file:///source.docx", source)
+
+        candidates = query_candidates(1, minhash_signature(new), 1)
+    assert list(candidates) == ["file:///source.docx"]
+    assert candidates["file:///source.docx"] == source
@@ -0,0 +1,113 @@
+import io
+import os
+import time
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app import grading_queue
+from app.grading_queue import (
+    DONE, FAILED, QUEUED, RUNNING, LeaseLostError, claim_next_job, enqueue_grading_job, get_job, process_job,
+    run_worker,
+)
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """
+    Stub the grading stages; `calls` records each stage and `broken` names the
+    stages that raise.
+    """
+    from app import evaluation, plagiarism, supabase_service
+
+    calls, broken = [], set()
+
+    def stage(name, result):
+        def run(*args, **kwargs):
+            calls.append(name)
+            if name in broken:
+                raise RuntimeError(f"{name} failed")
+            return result
+
+        return run
+
+    monkeypatch.setattr(evaluation, "extract_text_from_docx_path", stage("extract", "An essay."))
+    monkeypatch.setattr(
+        evaluation,
+        "evaluate_text_report",
+        stage("evaluate", {"score": 80, "feedback": "Good.", "tokens": {"tokens_before": 3, "tokens_after": 3}}),
+    )
+    monkeypatch.setattr(grading_queue, "_upload_in_app_context", stage("upload", "file:///essay.docx"))
+    monkeypatch.setattr(plagiarism, "plagiarism_report", stage("plagiarism", {"percent": 0.0, "matches": []}))
+    monkeypatch.setattr(supabase_service, "add_submission", stage("insert", 17))
+    monkeypatch.setattr(grading_queue, "_warm_reports", lambda *args: None)
+    return calls, broken
+
+
+def _enqueue():
+    return enqueue_grading_job(1, "s@example.com", FileStorage(io.BytesIO(b"docx bytes"), filename="essay.docx"))
+
+
+def test_claimed_job_is_held_until_done(app, stages):
+    with app.app_context():
+        job_id = _enqueue()
+        job = claim_next_job()
+        assert (job["id"], job["attempts"]) == (job_id, 1)
+        assert get_job(job_id)["status"] == RUNNING
+        assert claim_next_job() is None
+
+        process_job(job)
+        done = get_job(job_id)
+    assert (done["status"], done["submission_id"]) == (DONE, "17")
+    assert not os.path.exists(job["local_path"])
+
+
+def test_worker_with_an_expired_lease_does_not_insert(make_app, stages):
+    calls, _ = stages
+    app = make_app(GRADING_JOB_LEASE=0)
+    with app.app_context():
+        _enqueue()
+        stale = claim_next_job()
+        time.sleep(0.01)
+        current = claim_next_job()
+        assert current["id"] == stale["id"] and current["attempts"] == 2
+
+        with pytest.raises(LeaseLostError):
+            process_job(stale)
+        process_job(current)
+        with pytest.raises(LeaseLostError):
+            process_job(stale)
+
+        assert get_job(current["id"])["status"] == DONE
+    assert calls.count("insert") == 1
+
+
+def test_retry_resumes_after_the_last_finished_stage(make_app, stages):
+    calls, broken = stages
+    app = make_app(GRADING_RETRY_BACKOFF=0)
+    with app.app_context():
+        job_id = _enqueue()
+        broken.add("plagiarism")
+        run_worker(stop_after=1)
+        job = get_job(job_id)
+        assert (job["status"], job["score"], job["last_error"]) == (QUEUED, 80, "plagiarism failed")
+
+        broken.clear()
+        run_worker(stop_after=1)
+        assert get_job(job_id)["status"] == DONE
+    assert calls.count("evaluate") == 1
+    assert calls.count("plagiarism") == 2
+    assert calls.count("insert") == 1
+
+
+def test_final_failure_removes_the_upload(make_app, stages):
+    _, broken = stages
+    app = make_app(GRADING_MAX_ATTEMPTS=1)
+    with app.app_context():
+        job_id = _enqueue()
+        local_path = get_job(job_id)["local_path"]
+        broken.add("evaluate")
+        run_worker(stop_after=1)
+        job = get_job(job_id)
+    assert (job["status"], job["last_error"]) == (FAILED, "evaluate failed")
+    assert not os.path.exists(local_path)
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from app.llm_client import AdaptiveLimiter, CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+# ---------------- circuit breaker ---------------- #
+
+def _open_breaker(cooldown=60):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=cooldown)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record(success=False)
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = _open_breaker()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    breaker.record(success=False)
+    breaker.record(success=True)
+    breaker.record(success=False)
+    assert breaker.before_call() is False
+
+
+def test_throttling_is_neutral():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record(success=None)
+    assert breaker.before_call() is False
+
+
+def test_half_open_lets_exactly_one_trial_through():
+    breaker = _open_breaker(cooldown=0)
+    assert breaker.before_call() is True
+    # a call that started before the circuit opened finishes meanwhile
+    breaker.record(success=True)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record(success=True, trial=True)
+    assert breaker.before_call() is False
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = _open_breaker(cooldown=0)
+    assert breaker.before_call() is True
+    breaker.record(success=False, trial=True)
+    breaker.cooldown = 60
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+# ---------------- AIMD limiter ---------------- #
+
+def test_limiter_grows_additively_and_halves_on_throttling():
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=8, target_latency=10)
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(latency=0.1)
+    # +1/limit per success: about one slot per window of `limit` successes
+    assert 4.9 < limiter.limit < 5
+
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert 2.45 < limiter.limit < 2.5
+
+
+def test_limiter_cuts_once_per_window_and_respects_the_minimum():
+    limiter = AdaptiveLimiter(initial=8, minimum=2, maximum=8, target_latency=1)
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(latency=5)  # the same overload, reported by every call in flight
+    assert limiter.limit == 4
+
+    limiter.last_decrease = 0.0
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(throttled=True)
+        limiter.last_decrease = 0.0
+    assert limiter.limit == 2
+
+
+def test_limiter_blocks_beyond_the_limit():
+    limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1, target_latency=0)
+    limiter.acquire()
+    entered = threading.Event()
+
+    def second():
+        limiter.acquire()
+        entered.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    assert not entered.wait(0.1)
+    limiter.release(latency=0.1)
+    assert entered.wait(1)
+    thread.join()
+
+
+# ---------------- token bucket ---------------- #
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate_per_second=20, burst=3)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+    assert 0.07 <= elapsed < 0.5
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from app.local_backends import local_blob_path, save_local_blob
+
+
+def test_local_blob_path_round_trips_saved_blobs(tmp_path):
+    source = tmp_path / "essay.docx"
+    source.write_bytes(b"docx")
+    store = tmp_path / "blobs"
+
+    url = save_local_blob(str(store), str(source))
+    path = local_blob_path(str(store), url)
+    assert os.path.dirname(path) == os.path.realpath(store)
+    with open(path, "rb") as f:
+        assert f.read() == b"docx"
+
+
+@pytest.mark.parametrize("url", ["file:///etc/passwd", "file://{store}/../secret.docx"])
+def test_local_blob_path_rejects_paths_outside_the_store(tmp_path, url):
+    store = tmp_path / "blobs"
+    store.mkdir()
+    with pytest.raises(ValueError):
+        local_blob_path(str(store), url.format(store=store))
+
+
+@pytest.mark.parametrize("backend", ["cloudinary", "local"])
+def test_file_urls_are_only_read_from_the_local_store(make_app, tmp_path, backend):
+    from app.evaluation import _iter_source
+
+    app = make_app(STORAGE_BACKEND=backend)
+    secret = tmp_path / "secret.docx"
+    secret.write_bytes(b"secret")
+    with app.app_context(), pytest.raises(ValueError):
+        b"".join(_iter_source(f"file://{secret}"))
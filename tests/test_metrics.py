@@ -0,0 +1,48 @@
+import json
+import sqlite3
+
+from app import metrics
+
+
+def _rows(tmp_path):
+    conn = sqlite3.connect(tmp_path / "metrics.db")
+    try:
+        return {pid: json.loads(data) for pid, data in conn.execute("SELECT process_id, data FROM snapshots")}
+    finally:
+        conn.close()
+
+
+def _counter(totals, name):
+    return totals["counters"][metrics._key(name, {})]
+
+
+def test_stale_snapshots_fold_into_one_row(make_app, tmp_path, monkeypatch):
+    app = make_app(METRICS_RETENTION=0)
+    with app.app_context():
+        for _ in range(3):
+            # each registry stands in for a process that flushed once and exited
+            monkeypatch.setattr(metrics, "_registry", metrics._Registry())
+            metrics.increment("jobs_total", 2)
+            metrics.flush(force=True)
+
+        rows = _rows(tmp_path)
+        assert set(rows) == {metrics.RETIRED, metrics._registry.process_id}
+        assert _counter(metrics.collect(), "jobs_total") == 6
+
+
+def test_idle_process_is_not_counted_twice_after_folding(make_app, tmp_path, monkeypatch):
+    app = make_app(METRICS_RETENTION=0)
+    with app.app_context():
+        monkeypatch.setattr(metrics, "_registry", metrics._Registry())
+        metrics.increment("jobs_total", 5)
+        metrics.flush(force=True)
+
+        # another process flushes later and folds the first one's snapshot
+        first = metrics._registry
+        monkeypatch.setattr(metrics, "_registry", metrics._Registry())
+        metrics.flush(force=True)
+        assert first.process_id not in _rows(tmp_path)
+
+        monkeypatch.setattr(metrics, "_registry", first)
+        metrics.increment("jobs_total", 1)
+        assert _counter(metrics.collect(), "jobs_total") == 6
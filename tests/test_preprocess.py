@@ -0,0 +1,68 @@
+from app.chunking import count_tokens
+from app.preprocess import _fit, clean_paragraphs, prepare_text
+
+
+def test_clean_paragraphs_drops_layout_noise_and_repeats():
+    text = "\n".join([
+        "Course 101 Essay",
+        "Page 1 of 3",
+        "",
+        "Intro   paragraph here.",
+        "-----",
+        "Course 101 Essay",
+        "- 2 -",
+        "Contents",
+        "Introduction ........ 1",
+    ])
+    paragraphs, dropped = clean_paragraphs(text)
+    assert paragraphs == ["Course 101 Essay", "Intro paragraph here."]
+    assert dropped == 6
+
+
+def test_clean_paragraphs_keeps_numeric_answers():
+    paragraphs, dropped = clean_paragraphs("Question 1\n42\n3 / 4\n1999")
+    assert paragraphs == ["Question 1", "42", "3 / 4", "1999"]
+    assert dropped == 0
+
+
+def test_fit_keeps_head_and_tail_paragraphs():
+    paragraphs = [f"Paragraph {i}. " + "word " * 50 for i in range(200)]
+    fitted, omitted = _fit(paragraphs, 5000, "gpt-4.1-mini")
+    marker = next(i for i, p in enumerate(fitted) if p.startswith("[…"))
+    assert omitted == len(paragraphs) - (len(fitted) - 1)
+    assert fitted[:marker] == paragraphs[:marker]
+    assert fitted[marker + 1:] == paragraphs[len(paragraphs) - (len(fitted) - marker - 1):]
+    assert f"{omitted} paragraph(s) omitted" in fitted[marker]
+    assert count_tokens("\n".join(fitted)) <= 5000
+
+
+def test_fit_splits_a_single_oversized_paragraph():
+    paragraph = "Opening sentence. " + "filler " * 5000 + "Closing sentence."
+    fitted, omitted = _fit([paragraph], 1000, "gpt-4.1-mini")
+    assert omitted > 0
+    assert fitted[0].startswith("Opening sentence.")
+    assert fitted[-1].endswith("Closing sentence.")
+    assert count_tokens("\n".join(fitted)) <= 1000
+
+
+def test_prepare_text_within_budget():
+    text = "Opening. " + "word " * 20000 + "End."
+    cleaned, stats = prepare_text(text, 2000)
+    assert stats["truncated"]
+    assert stats["tokens_after"] <= 2000
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"]
+    assert cleaned.startswith("Opening.") and cleaned.endswith("End.")
+
+
+def test_prepare_text_without_budget_only_cleans():
+    cleaned, stats = prepare_text("Page 2\nA   short answer.", 0)
+    assert cleaned == "A short answer."
+    assert not stats["truncated"] and not stats["condensed"]
+    assert stats["blocks_dropped"] == 1
+
+
+def test_prepare_text_summarize_condenses_to_leading_sentences():
+    text = "\n".join(f"Topic {i}. " + "Detail sentence. " * 200 for i in range(20))
+    cleaned, stats = prepare_text(text, 400, "summarize")
+    assert stats["condensed"] and not stats["truncated"]
+    assert cleaned.splitlines() == [f"Topic {i}." for i in range(20)]
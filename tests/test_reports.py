@@ -0,0 +1,81 @@
+import io
+import time
+import zipfile
+
+import pytest
+
+from app.reports import PROFESSOR, STUDENT, ReportRenderError, get_report_pdf, iter_reports_zip, request_report_pdf
+
+ASSIGNMENT = {"id": 1, "title": "Essay"}
+SUBMISSION = {
+    "id": 7,
+    "assignment_id": 1,
+    "student_email": "s@example.com",
+    "score": 81,
+    "plagiarism_percent": 0.0,
+    "feedback": "Clear argument.",
+}
+
+
+def test_request_renders_in_the_background_then_serves_the_cache(app):
+    with app.app_context():
+        assert request_report_pdf(ASSIGNMENT, SUBMISSION, PROFESSOR) is None
+        for _ in range(100):
+            pdf = request_report_pdf(ASSIGNMENT, SUBMISSION, PROFESSOR)
+            if pdf is not None:
+                break
+            time.sleep(0.05)
+        assert pdf.startswith(b"%PDF")
+
+
+def test_changed_submission_is_not_served_stale(app):
+    with app.app_context():
+        get_report_pdf(ASSIGNMENT, SUBMISSION, STUDENT)
+        assert request_report_pdf(ASSIGNMENT, SUBMISSION, STUDENT) is not None
+        assert request_report_pdf(ASSIGNMENT, dict(SUBMISSION, score=40), STUDENT) is None
+
+
+def test_without_a_report_cache_the_request_renders_directly(make_app):
+    from config import Config
+
+    app = make_app(CACHE_TTLS=dict(Config.CACHE_TTLS, report=0))
+    with app.app_context():
+        assert request_report_pdf(ASSIGNMENT, SUBMISSION, STUDENT).startswith(b"%PDF")
+
+
+def _wait_for_renders():
+    from app import reports
+
+    while reports._rendering:
+        time.sleep(0.01)
+
+
+def test_failed_render_is_reported_instead_of_retried(app, monkeypatch):
+    from app import reports
+
+    calls = []
+
+    def broken(*args):
+        calls.append(args)
+        raise RuntimeError("font missing")
+
+    monkeypatch.setattr(reports, "render_report_pdf", broken)
+    with app.app_context():
+        assert request_report_pdf(ASSIGNMENT, SUBMISSION, STUDENT) is None
+        _wait_for_renders()
+        for _ in range(3):
+            with pytest.raises(ReportRenderError):
+                request_report_pdf(ASSIGNMENT, SUBMISSION, STUDENT)
+    assert len(calls) == 1
+
+
+def test_zip_holds_cached_and_freshly_rendered_reports(app):
+    submissions = [dict(SUBMISSION, id=i, student_email=f"s{i}@example.com") for i in range(5)]
+    with app.app_context():
+        get_report_pdf(ASSIGNMENT, submissions[2], PROFESSOR)
+        data = b"".join(iter_reports_zip(ASSIGNMENT, iter(submissions)))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        names = zf.namelist()
+        assert sorted(names) == sorted(f"s{i}_at_example.com_{i}.pdf" for i in range(5))
+        assert all(zf.read(name).startswith(b"%PDF") for name in names)
@@ -0,0 +1,50 @@
+import os
+import time
+
+from app import metrics
+from app.text_cache import TextCache
+
+
+def _cache(tmp_path, max_disk_bytes=10_000):
+    return TextCache(str(tmp_path / "texts"), max_memory_bytes=1_000_000, max_disk_bytes=max_disk_bytes)
+
+
+def _age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_lookups_count_memory_disk_and_misses(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("h1", "first text", url="file:///a.docx")
+    assert cache.get_by_url("file:///a.docx") == "first text"
+    assert _cache(tmp_path).get_by_hash("h1") == "first text"  # fresh process: from disk
+    assert cache.get_by_url("file:///unknown.docx") is None
+    assert cache.get_by_hash("h2") is None
+    assert {k: cache.stats[k] for k in ("hits", "misses")} == {"hits": 1, "misses": 2}
+
+
+def test_sweep_keeps_the_store_within_its_size(tmp_path):
+    cache = _cache(tmp_path, max_disk_bytes=2500)
+    for i in range(5):
+        cache.put(f"h{i}", "x" * 1000, url=f"file:///{i}.docx")
+        _age(cache._text_path(f"h{i}"), 100 - i)
+        _age(cache._url_path(f"file:///{i}.docx"), 100 - i)
+    # reading h0 from disk makes it the most recently used text
+    assert _cache(tmp_path).get_by_hash("h0")
+
+    assert cache._sweep() == 3
+    assert sorted(os.listdir(tmp_path / "texts" / "texts")) == ["h0.txt", "h4.txt"]
+    assert os.listdir(tmp_path / "texts" / "urls") == [os.path.basename(cache._url_path("file:///4.docx"))]
+    assert cache.stats["disk_evictions"] == 3
+
+
+def test_counters_reach_metrics(app, tmp_path):
+    with app.app_context():
+        cache = _cache(tmp_path)
+        cache.put("h1", "text")
+        cache.get_by_hash("h1")
+        cache.get_by_hash("missing")
+        counters = metrics.collect()["counters"]
+    assert counters[metrics._key("grader_text_cache_lookups_total", {"result": "hits"})] == 1
+    assert counters[metrics._key("grader_text_cache_lookups_total", {"result": "misses"})] == 1
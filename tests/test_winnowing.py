@@ -0,0 +1,41 @@
+import random
+
+from app.winnowing import MIN_MATCH_WORDS, fingerprints, highlight_segments, match_spans, merge_ranges, tokenize
+
+
+def _words(n, seed):
+    rng = random.Random(seed)
+    return [f"w{rng.randrange(100000)}" for _ in range(n)]
+
+
+def test_tokenize_lowercases_and_keeps_offsets():
+    words, offsets = tokenize("The  Quick, brown")
+    assert words == ["the", "quick", "brown"]
+    assert offsets == [(0, 3), (5, 10), (12, 17)]
+
+
+def test_fingerprints_cover_every_window():
+    words = _words(200, 1)
+    positions = [i for _, i in fingerprints(words)]
+    assert positions == sorted(set(positions))
+    # winnowing guarantee: no gap of WINDOW or more k-grams without a fingerprint
+    assert all(b - a <= 4 for a, b in zip(positions, positions[1:]))
+
+
+def test_match_spans_finds_the_whole_copied_passage():
+    source = _words(300, 2)
+    copied = source[100:160]
+    new = _words(50, 3) + copied + _words(50, 4)
+    spans = match_spans(new, source)
+    assert spans == [(50, 110, 100, 160)]
+
+
+def test_match_spans_ignores_passages_below_the_minimum():
+    source = _words(100, 5)
+    new = _words(20, 6) + source[10:10 + MIN_MATCH_WORDS - 1] + _words(20, 7)
+    assert match_spans(new, source) == []
+
+
+def test_merge_ranges_and_highlight_segments():
+    assert merge_ranges([(5, 8), (0, 3), (2, 4), (8, 9)]) == [(0, 4), (5, 9)]
+    assert highlight_segments("abcdefgh", [(2, 4), (3, 5)]) == [("ab", False), ("cde", True), ("fgh", False)]
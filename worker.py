@@ -0,0 +1,36 @@
+import argparse
+import multiprocessing
+
+from app import create_app
+
+
+def _worker_main(poll_interval):
+    from app.grading_queue import run_worker
+
+    app = create_app()
+    with app.app_context():
+        run_worker(poll_interval=poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run GRADER grading workers.")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds to wait when the queue is empty")
+    args = parser.parse_args()
+
+    processes = args.processes
+    if processes is None:
+        processes = create_app().config["GRADING_WORKERS"]
+
+    workers = [
+        multiprocessing.Process(target=_worker_main, args=(args.poll_interval,), daemon=True)
+        for _ in range(processes)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+
+if __name__ == "__main__":
+    main()